@@ -0,0 +1,176 @@
+import contextlib
+import io
+import numpy
+import os
+import statistics
+import time
+import tracemalloc
+
+from typing import Callable, Dict, List, Tuple
+
+from Benchmark import SyntheticDicom
+from Model.Base import Utils
+from Model.Base.SelectedFile import SelectedFile
+from Model.Registering.RegisteringModel import RegisteringModel
+from Model.Segmentation.Algorithms.Isocontour import isocontour_segment_image
+from Model.Segmentation.Algorithms.Watershed import watershed_segment_image
+from Model.Segmentation.SegmentationModel import SegmentationModel
+
+
+def measure(function: Callable[[], None], repeats: int) -> Dict[str, float]:
+    """
+    Measures the time and the memory used by a function.
+
+    The function is timed on each repeat, and run once more while tracing the memory allocations, so tracing does not
+    slow down the timed runs. Only the memory allocated through Python and numpy is traced, which includes the arrays
+    returned by OpenCV, but not the memory used internally by SimpleITK.
+
+    Args:
+        function: A Callable method without arguments, representing the measured operation.
+        repeats: An integer, representing the number of timed runs.
+
+    Returns:
+        A dictionary with the median and minimum time in seconds and the peak of traced memory in bytes.
+    """
+    times = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start_time)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'seconds': statistics.median(times), 'min_seconds': min(times), 'peak_memory': peak_memory}
+
+
+def run_benchmarks(work_folder: str, shape: Tuple[int, int, int], repeats: int,
+                   registration_iterations: int) -> Dict[str, Dict[str, float]]:
+    """
+    Writes two synthetic DICOM series, the second one displaced, and measures the main operations of the tools on
+    them.
+
+    Args:
+        work_folder: A string, representing the folder where the synthetic series are written.
+        shape: A tuple of three integers, representing the rows, columns and slices of the series.
+        repeats: An integer, representing the number of timed runs of each operation.
+        registration_iterations: An integer, representing the maximum number of iterations of the registration.
+
+    Returns:
+        A dictionary with the measures of each operation, as returned by measure, with its throughput and the unit
+        of the throughput.
+    """
+    fixed_path = os.path.join(work_folder, 'fixed')
+    moving_path = os.path.join(work_folder, 'moving')
+    SyntheticDicom.write_series(fixed_path, SyntheticDicom.create_phantom(shape))
+    SyntheticDicom.write_series(moving_path, SyntheticDicom.create_phantom(shape, offset=(3, -2, 1)))
+
+    fixed_file = SelectedFile(False, fixed_path)
+    fixed_file.read()
+    moving_file = SelectedFile(False, moving_path)
+    moving_file.read()
+
+    tensor = fixed_file.image_tensor
+    megavoxels = tensor.size / 1e6
+    slices = [tensor[:, :, slice_index] for slice_index in range(tensor.shape[2])]
+
+    # The rendered images are written into the same output, as a view that reuses its buffer.
+    window_level = fixed_file.get_display_window()
+    rendered_image = numpy.empty((400, 400), dtype=numpy.uint8)
+
+    # The thresholds select the dense spheres, stored with an intercept of -1024.
+    upper_threshold, lower_threshold = 4095, 1224
+
+    # The cache of rendered slices is disabled, so each slice is rendered. The contiguous copies of the axes are
+    # disabled too, whatever the environment sets, since building them in background would overlap the timed renders.
+    segmentation_model = SegmentationModel(lambda action_code, **kwargs: None, slice_cache_size=0,
+                                           prefetched_slices=0, axis_layouts_size=0)
+    segmentation_model.load_dicom_image(fixed_file)
+
+    registering_model = RegisteringModel(lambda action_code, **kwargs: None)
+    registering_model.set_picked_files(fixed_file, moving_file)
+
+    def register_images():
+        with contextlib.redirect_stdout(io.StringIO()):
+            registering_model.register_images(learning_rate=1.0, number_iterations=registration_iterations,
+                                              similarity_function=0)
+
+    cases: List[Tuple[str, Callable[[], None], float, str]] = [
+        ('read', lambda: SelectedFile(False, fixed_path).read(), megavoxels, 'Mvoxels/s'),
+        ('resize_image', lambda: [Utils.resize_image(image, size=(400, 400), background_color=127)
+                                  for image in slices], len(slices), 'slices/s'),
+        ('render_image', lambda: [Utils.render_image(image, size=(400, 400), window_level=window_level,
+                                                     background_color=127, output=rendered_image)
+                                  for image in slices], len(slices), 'slices/s'),
+        ('get_slice_image', lambda: [segmentation_model.get_slice_image(2, slice_index)
+                                     for slice_index in range(len(slices))], len(slices), 'slices/s'),
+        ('isocontour', lambda: [isocontour_segment_image(image, upper_threshold, lower_threshold)
+                                for image in slices], len(slices), 'slices/s'),
+        ('watershed', lambda: [watershed_segment_image(image, 120) for image in slices], len(slices), 'slices/s'),
+        ('register_images', register_images, megavoxels, 'Mvoxels/s')
+    ]
+
+    results = {}
+    for name, function, processed_units, unit in cases:
+        results[name] = measure(function, repeats)
+        results[name]['throughput'] = processed_units / results[name]['seconds']
+        results[name]['unit'] = unit
+
+    return results
+
+
+def compare_with_baseline(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+                          tolerance: float) -> List[str]:
+    """
+    Finds the operations that are slower than in a baseline.
+
+    Args:
+        results: A dictionary with the measures of each operation, as returned by run_benchmarks.
+        baseline: A dictionary with the measures of a previous run, in the same format.
+        tolerance: A float, representing the fraction of time that an operation can increase without being
+                   reported.
+
+    Returns:
+        A list of strings, describing each operation slower than the baseline.
+    """
+    regressions = []
+    for name, measures in results.items():
+        if name not in baseline:
+            continue
+
+        ratio = measures['seconds'] / baseline[name]['seconds']
+        if ratio > 1 + tolerance:
+            regressions.append('{0} is {1:.0%} slower than the baseline ({2:.2f} ms instead of {3:.2f} ms)'.format(
+                name, ratio - 1, measures['seconds'] * 1000, baseline[name]['seconds'] * 1000))
+
+    return regressions
+
+
+def format_results(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]] = None) -> str:
+    """
+    Formats the measures of the operations as a table.
+
+    Args:
+        results: A dictionary with the measures of each operation, as returned by run_benchmarks.
+        baseline: A dictionary with the measures of a previous run, to show the time relative to it (optional).
+
+    Returns:
+        A string, representing the table.
+    """
+    lines = ['{0:<16} {1:>12} {2:>22} {3:>12} {4:>10}'.format('operation', 'time (ms)', 'throughput',
+                                                               'peak (MB)', 'baseline')]
+
+    for name, measures in results.items():
+        relative_time = ''
+        if baseline is not None and name in baseline:
+            relative_time = '{0:.2f}x'.format(measures['seconds'] / baseline[name]['seconds'])
+
+        lines.append('{0:<16} {1:>12.2f} {2:>12.1f} {3:<9} {4:>12.1f} {5:>10}'.format(
+            name, measures['seconds'] * 1000, measures['throughput'], measures['unit'],
+            measures['peak_memory'] / 1024 ** 2, relative_time))
+
+    return '\n'.join(lines)
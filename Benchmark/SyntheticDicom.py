@@ -0,0 +1,105 @@
+import numpy
+import os
+
+from typing import Tuple
+
+from Model.Base.LazyModule import LazyModule
+
+pydicom = LazyModule('pydicom')
+
+
+def create_phantom(shape: Tuple[int, int, int], offset: Tuple[float, float, float] = (0, 0, 0),
+                   seed: int = 0) -> numpy.ndarray:
+    """
+    Creates a CT-like volume: an ellipsoidal body of soft tissue with some dense spheres inside, surrounded by air
+    and with gaussian noise.
+
+    Args:
+        shape: A tuple of three integers, representing the rows, columns and slices of the volume.
+        offset: A tuple of three floats, representing the displacement of the body in voxels along each axis.
+        seed: An integer, representing the seed of the noise and of the spheres.
+
+    Returns:
+        The volume in Hounsfield units, represented as an int16 numpy array of the given shape.
+    """
+    random_generator = numpy.random.default_rng(seed)
+    rows, columns, slices = numpy.ogrid[0:shape[0], 0:shape[1], 0:shape[2]]
+
+    center = [(size - 1) / 2 + displacement for size, displacement in zip(shape, offset)]
+    radius = [size * 0.4 for size in shape]
+
+    volume = numpy.full(shape, -1000, dtype=numpy.float32)
+    body = ((rows - center[0]) / radius[0]) ** 2 + ((columns - center[1]) / radius[1]) ** 2 + \
+        ((slices - center[2]) / radius[2]) ** 2 <= 1
+    volume[body] = 40
+
+    for _ in range(6):
+        sphere_center = [position + random_generator.uniform(-0.5, 0.5) * size
+                         for position, size in zip(center, radius)]
+        sphere_radius = random_generator.uniform(0.1, 0.2) * min(radius)
+        sphere = (rows - sphere_center[0]) ** 2 + (columns - sphere_center[1]) ** 2 + \
+            (slices - sphere_center[2]) ** 2 <= sphere_radius ** 2
+        volume[sphere & body] = random_generator.uniform(300, 1200)
+
+    volume += random_generator.normal(0, 20, shape).astype(numpy.float32)
+
+    return numpy.clip(volume, -1024, 3071).astype(numpy.int16)
+
+
+def write_series(folder_path: str, volume: numpy.ndarray, spacing: Tuple[float, float, float] = (0.7, 0.7, 2.5),
+                 rescale_intercept: float = -1024.0):
+    """
+    Writes a volume as a series of CT DICOM files, one per slice, with the geometry of an axial acquisition.
+
+    Args:
+        folder_path: A string, representing the folder where the files are written. It is created if it does not
+                     exist.
+        volume: The volume in Hounsfield units, represented as a numpy array of shape (rows, columns, slices).
+        spacing: A tuple of three floats, representing the spacing of the rows, columns and slices in millimetres.
+        rescale_intercept: A float, representing the intercept subtracted from the Hounsfield units to store them.
+    """
+    os.makedirs(folder_path, exist_ok=True)
+
+    uid = pydicom.uid
+    study_uid, series_uid = uid.generate_uid(), uid.generate_uid()
+    stored_volume = (volume - rescale_intercept).astype(numpy.uint16)
+
+    for slice_index in range(volume.shape[2]):
+        file_meta = pydicom.dataset.FileMetaDataset()
+        file_meta.MediaStorageSOPClassUID = uid.CTImageStorage
+        file_meta.MediaStorageSOPInstanceUID = uid.generate_uid()
+        file_meta.TransferSyntaxUID = uid.ExplicitVRLittleEndian
+
+        dataset = pydicom.dataset.Dataset()
+        dataset.file_meta = file_meta
+        dataset.SOPClassUID = file_meta.MediaStorageSOPClassUID
+        dataset.SOPInstanceUID = file_meta.MediaStorageSOPInstanceUID
+        dataset.Modality = 'CT'
+        dataset.StudyInstanceUID = study_uid
+        dataset.SeriesInstanceUID = series_uid
+        dataset.InstanceNumber = slice_index + 1
+
+        dataset.Rows, dataset.Columns = volume.shape[0], volume.shape[1]
+        dataset.SamplesPerPixel = 1
+        dataset.PhotometricInterpretation = 'MONOCHROME2'
+        dataset.BitsAllocated = 16
+        dataset.BitsStored = 16
+        dataset.HighBit = 15
+        dataset.PixelRepresentation = 0
+        dataset.RescaleSlope = 1
+        dataset.RescaleIntercept = rescale_intercept
+
+        dataset.PixelSpacing = [spacing[0], spacing[1]]
+        dataset.SliceThickness = spacing[2]
+        dataset.ImageOrientationPatient = [1, 0, 0, 0, 1, 0]
+        dataset.ImagePositionPatient = [0, 0, slice_index * spacing[2]]
+        dataset.SliceLocation = slice_index * spacing[2]
+
+        dataset.PixelData = numpy.ascontiguousarray(stored_volume[:, :, slice_index]).tobytes()
+
+        file_path = os.path.join(folder_path, 'IM{0:04d}.dcm'.format(slice_index))
+        try:
+            pydicom.dcmwrite(file_path, dataset, enforce_file_format=True)
+        except TypeError:
+            # The versions of pydicom before 3.0 name this argument differently.
+            pydicom.dcmwrite(file_path, dataset, write_like_original=False)
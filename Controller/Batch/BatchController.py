@@ -0,0 +1,298 @@
+import json
+import numpy
+import os
+import time
+
+from concurrent.futures import as_completed
+from typing import Dict, List, Tuple
+
+from Model.Base import DicomSeriesLoader
+from Model.Base.SelectedFile import SelectedFile
+from Model.Registering.RegisteringListenerCode import RegisteringListenerCode
+from Model.Registering.RegisteringModel import RegisteringModel
+from Model.Segmentation.Algorithms.Configuration.SegmentationAlgorithm import SegmentationAlgorithm
+from Model.Segmentation.Algorithms.Configuration.SegmentationConfiguration import SegmentationConfiguration
+from Model.Segmentation.SegmentationModel import SegmentationModel
+
+
+class BatchController:
+
+    def __init__(self, output_path: str, workers: int = None, read_workers: int = 1):
+        """
+        Initializes the object that processes many studies without the graphical interface.
+
+        Each study is processed in a worker process, and its results are written in its own folder inside the output
+        folder. A summary of all the studies is written in summary.json.
+
+        Args:
+            output_path: A string, representing the folder where the results are written.
+            workers: An integer, representing the number of studies processed at the same time. If None, one per
+                     core is used.
+            read_workers: An integer, representing the number of threads used to read each study.
+        """
+        self.__output_path = output_path
+        self.__workers = workers
+        self.__read_workers = read_workers
+
+    def segment(self, studies_paths: List[str], configuration: SegmentationConfiguration) -> List[Dict]:
+        """
+        Segments every slice of each study and writes its mask and its statistics.
+
+        Args:
+            studies_paths: A list of strings, representing the paths of the DICOM files or folders.
+            configuration: A SegmentationConfiguration object, with the algorithm and its parameters.
+
+        Returns:
+            A list of dictionaries, with the result of each study.
+        """
+        names = [self.__get_study_name(study_path) for study_path in studies_paths]
+
+        jobs = [(segment_study, (study_path, output_path, configuration, self.__read_workers))
+                for study_path, output_path in zip(studies_paths, self.__get_output_paths(names))]
+
+        return self.__run(jobs)
+
+    def register(self, studies_pairs: List[Tuple[str, str]], parameters: Dict) -> List[Dict]:
+        """
+        Registers the second study of each pair to the first one and writes the registered volume.
+
+        Args:
+            studies_pairs: A list of tuples with the paths of the fixed and the moving study.
+            parameters: A dictionary with the parameters of RegisteringModel.register_images.
+
+        Returns:
+            A list of dictionaries, with the result of each pair.
+        """
+        names = ['{0}__{1}'.format(self.__get_study_name(fixed_path), self.__get_study_name(moving_path))
+                 for fixed_path, moving_path in studies_pairs]
+
+        jobs = [(register_study, (fixed_path, moving_path, output_path, parameters, self.__read_workers))
+                for (fixed_path, moving_path), output_path in zip(studies_pairs, self.__get_output_paths(names))]
+
+        return self.__run(jobs)
+
+    def __run(self, jobs: List[Tuple]) -> List[Dict]:
+        """
+        Runs the jobs in a process pool, reports each one when it finishes and writes the summary.
+
+        Args:
+            jobs: A list of tuples with the function of each job and its arguments.
+
+        Returns:
+            A list of dictionaries, with the result of each job in the order of the jobs.
+        """
+        os.makedirs(self.__output_path, exist_ok=True)
+        results = [None] * len(jobs)
+
+        with DicomSeriesLoader.create_executor(self.__workers, use_processes=True) as executor:
+            futures = {executor.submit(function, *arguments): index
+                       for index, (function, arguments) in enumerate(jobs)}
+
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as exception:
+                    # The worker process failed before the job could report its own error.
+                    results[index] = {'status': 'error', 'error': str(exception)}
+
+                print('[{0}/{1}] {2}: {3}'.format(sum(result is not None for result in results), len(jobs),
+                                                  results[index].get('output_path', index), results[index]['status']))
+
+        with open(os.path.join(self.__output_path, 'summary.json'), 'w') as summary_file:
+            json.dump(results, summary_file, indent=2)
+
+        return results
+
+    def __get_output_paths(self, names: List[str]) -> List[str]:
+        """
+        Returns a different output folder for each study.
+
+        Args:
+            names: A list of strings, representing the names of the studies.
+
+        Returns:
+            A list of strings, representing the output folders. The repeated names are numbered.
+        """
+        output_paths = []
+        used_names = set()
+
+        for name in names:
+            unique_name = name
+            index = 1
+            while unique_name in used_names:
+                unique_name = '{0}_{1}'.format(name, index)
+                index += 1
+
+            used_names.add(unique_name)
+            output_paths.append(os.path.join(self.__output_path, unique_name))
+
+        return output_paths
+
+    @staticmethod
+    def __get_study_name(study_path: str) -> str:
+        """
+        Returns the name of a study from its path.
+
+        Args:
+            study_path: A string, representing the path of the DICOM file or folder.
+
+        Returns:
+            A string, representing the name of the file without extension or the name of the folder.
+        """
+        return os.path.splitext(os.path.basename(os.path.normpath(study_path)))[0]
+
+
+def read_study(study_path: str, read_workers: int) -> SelectedFile:
+    """
+    Reads a DICOM file or folder.
+
+    Args:
+        study_path: A string, representing the path of the DICOM file or folder.
+        read_workers: An integer, representing the number of threads used to read a folder.
+
+    Returns:
+        A SelectedFile object, already read.
+    """
+    selected_file = SelectedFile(os.path.isfile(study_path), study_path, workers=read_workers)
+    selected_file.read()
+
+    return selected_file
+
+
+def get_study_volume(selected_file: SelectedFile) -> Tuple[numpy.ndarray, List[float]]:
+    """
+    Returns the tensor of a study in the layout of the series read from a folder: (rows, columns, slices). A single
+    image is returned as a volume of one slice, and the frames of a multi-frame file, stored in the first axis of its
+    tensor, are moved to the last axis.
+
+    Args:
+        selected_file: A SelectedFile object, already read.
+
+    Returns:
+        A tuple with the volume, represented as a numpy array, and the spacing of each of its axes.
+    """
+    tensor, spacing = selected_file.image_tensor, selected_file.spacing
+
+    if tensor.ndim == 2:
+        return tensor[:, :, numpy.newaxis], spacing
+    elif selected_file.is_file():
+        return numpy.moveaxis(tensor, 0, -1), [spacing[1], spacing[2], spacing[0]]
+
+    return tensor, spacing
+
+
+def segment_study(study_path: str, output_path: str, configuration: SegmentationConfiguration,
+                  read_workers: int) -> Dict:
+    """
+    Segments every slice of a study with SegmentationModel.segment_image. It is run in a worker process.
+
+    The mask of the volume is written in mask.npy, as a uint8 array of shape (rows, columns, slices) with 1 in the
+    segmented voxels, and the number of voxels and their volume in statistics.json. A single DICOM file is segmented
+    as a volume with one slice per frame, as returned by get_study_volume.
+
+    Args:
+        study_path: A string, representing the path of the DICOM file or folder.
+        output_path: A string, representing the folder where the results are written.
+        configuration: A SegmentationConfiguration object, with the algorithm and its parameters.
+        read_workers: An integer, representing the number of threads used to read the study.
+
+    Returns:
+        A dictionary with the result of the study.
+    """
+    result = {'study_path': study_path, 'output_path': output_path}
+    start_time = time.perf_counter()
+
+    try:
+        selected_file = read_study(study_path, read_workers)
+
+        model = SegmentationModel(lambda action_code, **kwargs: None)
+        tensor, spacing = get_study_volume(selected_file)
+        mask = numpy.zeros(tensor.shape, dtype=numpy.uint8)
+
+        for slice_index in range(tensor.shape[2]):
+            segmented_images = model.segment_image(numpy.ascontiguousarray(tensor[:, :, slice_index]),
+                                                   configuration)
+
+            if configuration.get_algorithm() == SegmentationAlgorithm.ISOCONTOUR:
+                mask[:, :, slice_index] = segmented_images[0]
+            else:
+                mask[:, :, slice_index] = segmented_images[1] > 1
+
+        os.makedirs(output_path, exist_ok=True)
+        numpy.save(os.path.join(output_path, 'mask.npy'), mask)
+
+        voxels = int(numpy.count_nonzero(mask))
+        result.update({'status': 'ok',
+                       'algorithm': configuration.get_algorithm().name,
+                       'configuration': configuration.get_configuration(),
+                       'shape': list(tensor.shape),
+                       'spacing': spacing,
+                       'voxels': voxels,
+                       'volume': voxels * float(numpy.prod(spacing))})
+    except Exception as exception:
+        result.update({'status': 'error', 'error': str(exception)})
+
+    result['seconds'] = time.perf_counter() - start_time
+
+    if result['status'] == 'ok':
+        with open(os.path.join(output_path, 'statistics.json'), 'w') as statistics_file:
+            json.dump(result, statistics_file, indent=2)
+
+    return result
+
+
+def register_study(fixed_path: str, moving_path: str, output_path: str, parameters: Dict, read_workers: int) -> Dict:
+    """
+    Registers a moving study to a fixed one with RegisteringModel.register_images. It is run in a worker process.
+
+    The moving study resampled in the grid of the fixed one is written in registered.npy, and the result of the
+    registration in registration.json.
+
+    Args:
+        fixed_path: A string, representing the path of the fixed DICOM file or folder.
+        moving_path: A string, representing the path of the moving DICOM file or folder.
+        output_path: A string, representing the folder where the results are written.
+        parameters: A dictionary with the parameters of RegisteringModel.register_images.
+        read_workers: An integer, representing the number of threads used to read each study.
+
+    Returns:
+        A dictionary with the result of the pair.
+    """
+    result = {'fixed_path': fixed_path, 'moving_path': moving_path, 'output_path': output_path}
+    events = {}
+    start_time = time.perf_counter()
+
+    def model_listener(action_code: RegisteringListenerCode, **kwargs):
+        events[action_code] = kwargs
+
+    try:
+        model = RegisteringModel(model_listener)
+        model.set_picked_files(SelectedFile(os.path.isfile(fixed_path), fixed_path, workers=read_workers),
+                               SelectedFile(os.path.isfile(moving_path), moving_path, workers=read_workers))
+
+        if events[RegisteringListenerCode.IMAGES_READ]['status'] != 1:
+            raise ValueError("The studies could not be read.")
+
+        model.register_images(**parameters)
+
+        if events[RegisteringListenerCode.REGISTERING_DID_FINISH]['status'] != 1:
+            raise ValueError("The registration did not finish.")
+
+        os.makedirs(output_path, exist_ok=True)
+        numpy.save(os.path.join(output_path, 'registered.npy'), model.get_registered_images())
+
+        result.update({'status': 'ok',
+                       'parameters': parameters,
+                       'metric_value': events.get(RegisteringListenerCode.REGISTERING_DID_PROGRESS,
+                                                  {}).get('metric_value')})
+    except Exception as exception:
+        result.update({'status': 'error', 'error': str(exception)})
+
+    result['seconds'] = time.perf_counter() - start_time
+
+    if result['status'] == 'ok':
+        with open(os.path.join(output_path, 'registration.json'), 'w') as registration_file:
+            json.dump(result, registration_file, indent=2)
+
+    return result
@@ -0,0 +1,64 @@
+import queue
+import threading
+import tkinter as tk
+
+from enum import Enum
+from typing import Callable
+
+
+class ModelEventDispatcher:
+
+    __events_polling_interval = 50
+
+    def __init__(self, handle: Callable[..., None]):
+        """
+        Initializes the object that delivers the events of a model to its controller in the Tk thread.
+
+        The models send some events from background threads, as the end of a read or the progress of a registration,
+        and Tk widgets can only be updated from the thread of the main loop. The events sent from the main thread are
+        handled immediately, and the rest are queued until the queue is polled from the Tk thread.
+
+        Args:
+            handle: A Callable method that receives the action code and the arguments of an event. It is always called
+                    in the Tk thread.
+        """
+        self.__handle = handle
+        self.__events = queue.Queue()
+        self.__root_view: tk.Tk = None
+
+    def start(self, root_view: tk.Tk):
+        """
+        Starts polling the queued events from the main loop of a view.
+
+        Args:
+            root_view: The root Tk object, used to handle the events in its thread.
+        """
+        self.__root_view = root_view
+        self.__root_view.after(self.__events_polling_interval, self.__dispatch_events)
+
+    def send(self, action_code: Enum, **kwargs):
+        """
+        Listener of the events sent by the model. The events sent from a background thread are queued, so they are
+        handled in the Tk thread.
+
+        Args:
+            action_code: A ListenerCode value, representing the action to handle.
+            **kwargs: Arguments of the action.
+        """
+        if threading.current_thread() is threading.main_thread():
+            self.__handle(action_code, **kwargs)
+        else:
+            self.__events.put((action_code, kwargs))
+
+    def __dispatch_events(self):
+        """
+        Handles the queued events of the model and schedules the next polling of the queue.
+        """
+        try:
+            while True:
+                action_code, kwargs = self.__events.get_nowait()
+                self.__handle(action_code, **kwargs)
+        except queue.Empty:
+            pass
+
+        self.__root_view.after(self.__events_polling_interval, self.__dispatch_events)
@@ -1,4 +1,6 @@
-from Controller.Registering.RegisteringListenerCode import RegisteringListenerCode
+from Controller.ModelEventDispatcher import ModelEventDispatcher
+from Controller.RenderScheduler import RenderScheduler
+from Model.Registering.RegisteringListenerCode import RegisteringListenerCode
 from Model.Registering.RegisteringModel import RegisteringModel
 from View.Registering import RegisterGUI
 
@@ -9,9 +11,15 @@ class RegisteringController:
         """
         Initializes the object that manages the events in the execution.
         """
-        self.__model = RegisteringModel(self.controller_listener)
+        self.__model_events = ModelEventDispatcher(self.controller_listener)
+        self.__model = RegisteringModel(self.__model_events.send)
 
         self.__root_view, self.__view = RegisterGUI.show_main_view(self.controller_listener)
+        self.__render_scheduler = RenderScheduler(self.__root_view,
+                                                  render=self.__render_images,
+                                                  display=self.__display_images,
+                                                  on_error=self.__view.show_render_error)
+        self.__model_events.start(self.__root_view)
         self.__root_view.mainloop()
 
     def controller_listener(self, action_code: RegisteringListenerCode, **kwargs):
@@ -34,29 +42,49 @@ class RegisteringController:
                 self.__view.enable_widgets()
                 self.__view.set_slider_limit(0, kwargs['upper_limit'])
 
-                image1, image2, alpha_image, registered = self.__model.get_tensor_images(axis=0,
-                                                                                         slice=0,
-                                                                                         alpha=100)
-                self.__view.set_images(image1, image2, alpha_image, registered)
+                self.__render_scheduler.schedule(axis=0, slice=0, alpha=100)
 
         elif action_code == RegisteringListenerCode.RADIO_BUTTON_CHANGED:
             limit = self.__model.get_tensor_limit_for_axis(axis=kwargs['axis'])
             self.__view.set_slider_limit(0, limit)
 
-            image1, image2, alpha_image, registered = self.__model.get_tensor_images(axis=kwargs['axis'],
-                                                                                     slice=0,
-                                                                                     alpha=100)
-            self.__view.set_images(image1, image2, alpha_image, registered)
+            self.__render_scheduler.schedule(axis=kwargs['axis'], slice=0, alpha=100)
 
         elif action_code == RegisteringListenerCode.SLICE_SLIDER_CHANGED or \
                 action_code == RegisteringListenerCode.ALPHA_SLIDER_CHANGED:
-            image1, image2, alpha_image, registered = self.__model.get_tensor_images(axis=kwargs['axis'],
-                                                                                     slice=kwargs['slice'],
-                                                                                     alpha=kwargs['alpha'])
-            self.__view.set_images(image1, image2, alpha_image, registered)
+            self.__render_scheduler.schedule(axis=kwargs['axis'], slice=kwargs['slice'], alpha=kwargs['alpha'])
 
         elif action_code == RegisteringListenerCode.REGISTERING_WILL_START:
-            self.__model.register_images(**kwargs)
+            self.__view.begin_registration()
+            self.__model.start_registration(**kwargs)
+
+        elif action_code == RegisteringListenerCode.REGISTERING_DID_PROGRESS:
+            self.__view.set_registration_progress(kwargs['level'], kwargs['iteration'], kwargs['metric_value'])
+
+        elif action_code == RegisteringListenerCode.REGISTERING_WILL_CANCEL:
+            self.__model.cancel_registration()
 
         elif action_code == RegisteringListenerCode.REGISTERING_DID_FINISH:
-            self.__view.end_registration()
+            self.__view.end_registration(kwargs['status'], kwargs.get('error'))
+
+    def __render_images(self, **kwargs):
+        """
+        Computes the images to be shown. It is called by the render scheduler in background.
+
+        Args:
+            **kwargs: The visualization parameters: axis, slice and alpha.
+
+        Returns:
+            A tuple with the first image, the second image, the alpha-combination and the registered image.
+        """
+        return self.__model.get_tensor_images(axis=kwargs['axis'], slice=kwargs['slice'], alpha=kwargs['alpha'])
+
+    def __display_images(self, images):
+        """
+        Shows the images computed by the render scheduler.
+
+        Args:
+            images: A tuple with the first image, the second image, the alpha-combination and the registered image.
+        """
+        image1, image2, alpha_image, registered = images
+        self.__view.set_images(image1, image2, alpha_image, registered)
@@ -0,0 +1,105 @@
+import logging
+import queue
+import threading
+import tkinter as tk
+
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class RenderScheduler:
+
+    __results_polling_interval = 15
+
+    def __init__(self, root_view: tk.Tk, render: Callable[..., Any], display: Callable[[Any], None],
+                 on_error: Callable[[Exception], None] = None):
+        """
+        Initializes the scheduler that renders the images requested by a view in a background thread.
+
+        Only the latest requested parameters are kept: the requests received while an image is being rendered
+        replace each other, so dragging a slider renders the last position instead of every intermediate one. The
+        rendered images are displayed in the Tk thread.
+
+        If a render fails, the exception is logged with its traceback and sent to the Tk thread like a result. Only the
+        first error after a successful render is reported, so a failing slider drag does not report every position.
+
+        Args:
+            root_view: The root Tk object, used to display the rendered images in its thread.
+            render: A Callable method that receives the parameters of a request as keyword arguments and returns the
+                    rendered images. It is called in the background thread.
+            display: A Callable method that receives the rendered images and shows them. It is called in the Tk
+                     thread.
+            on_error: A Callable method that receives the exception of a failed render (optional). It is called in
+                      the Tk thread.
+        """
+        self.__root_view = root_view
+        self.__render = render
+        self.__display = display
+        self.__on_error = on_error
+        self.__is_failing = False
+
+        self.__condition = threading.Condition()
+        self.__pending_parameters: dict = None
+
+        self.__results = queue.Queue()
+
+        self.__worker = threading.Thread(target=self.__render_requests, daemon=True)
+        self.__worker.start()
+
+        self.__root_view.after(self.__results_polling_interval, self.__display_results)
+
+    def schedule(self, **parameters):
+        """
+        Requests an image with certain parameters, replacing the request that has not started yet, if any.
+
+        Args:
+            **parameters: The parameters passed to the render method.
+        """
+        with self.__condition:
+            self.__pending_parameters = parameters
+            self.__condition.notify()
+
+    def __render_requests(self):
+        """
+        Loop of the background thread, that renders the latest requested parameters.
+        """
+        while True:
+            with self.__condition:
+                while self.__pending_parameters is None:
+                    self.__condition.wait()
+
+                parameters = self.__pending_parameters
+                self.__pending_parameters = None
+
+            try:
+                self.__results.put((self.__render(**parameters), None))
+            except Exception as exception:
+                logger.exception('Rendering error')
+                self.__results.put((None, exception))
+
+    def __display_results(self):
+        """
+        Displays the last rendered images, discarding the older ones, or reports the error of the last render, and
+        schedules the next polling.
+        """
+        result = None
+        error = None
+        has_result = False
+
+        try:
+            while True:
+                result, error = self.__results.get_nowait()
+                has_result = True
+        except queue.Empty:
+            pass
+
+        if has_result and error is None:
+            self.__is_failing = False
+            self.__display(result)
+        elif has_result and not self.__is_failing:
+            self.__is_failing = True
+            if self.__on_error is not None:
+                self.__on_error(error)
+
+        self.__root_view.after(self.__results_polling_interval, self.__display_results)
@@ -1,4 +1,6 @@
-from Controller.Segmentation.SegmentationListenerCode import SegmentationListenerCode
+from Controller.ModelEventDispatcher import ModelEventDispatcher
+from Controller.RenderScheduler import RenderScheduler
+from Model.Segmentation.SegmentationListenerCode import SegmentationListenerCode
 from Model.Segmentation.SegmentationModel import SegmentationModel
 from View.Segmentation import SegmentationGUI
 
@@ -9,9 +11,15 @@ class SegmentationController:
         """
         Initializes the object that manages the events in the execution.
         """
-        self.__model = SegmentationModel(self.controller_listener)
+        self.__model_events = ModelEventDispatcher(self.controller_listener)
+        self.__model = SegmentationModel(self.__model_events.send)
 
         self.__root_view, self.__view = SegmentationGUI.show_main_view(self.controller_listener)
+        self.__render_scheduler = RenderScheduler(self.__root_view,
+                                                  render=self.__render_images,
+                                                  display=self.__display_images,
+                                                  on_error=self.__view.show_render_error)
+        self.__model_events.start(self.__root_view)
         self.__root_view.mainloop()
 
     def controller_listener(self, action_code: SegmentationListenerCode, **kwargs):
@@ -32,15 +40,49 @@ class SegmentationController:
 
             self.__view.enable_widgets()
             self.__view.set_slider_limit(0, z_axis_limit)
-            self.__view.set_segmentation_methods_slider_limit(lower_limit=tensor_range[0], upper_limit=tensor_range[1])
+            if tensor_range is not None:
+                self.__view.set_segmentation_methods_slider_limit(lower_limit=tensor_range[0],
+                                                                  upper_limit=tensor_range[1])
             self.__view.set_images(original_image=read_image)
+        elif action_code == SegmentationListenerCode.DID_LOAD_VOLUME:
+            tensor_range = kwargs['tensor_range']
+            self.__view.set_segmentation_methods_slider_limit(lower_limit=tensor_range[0], upper_limit=tensor_range[1])
+        elif action_code == SegmentationListenerCode.DID_FAIL_LOADING_VOLUME:
+            self.__view.show_volume_error(kwargs['error'])
         elif action_code == SegmentationListenerCode.VISUALIZATION_PARAMETERS_DID_CHANGE:
-            slice_image = self.__model.get_slice_image(kwargs['axis'], kwargs['slice'])
-            segmented_mask, segmented_marked = self.__model.segment_image(slice_image, kwargs['segmentation_settings'])
-
-            self.__view.set_images(original_image=slice_image,
-                                   mask_image=segmented_mask,
-                                   marked_image=segmented_marked)
+            self.__render_scheduler.schedule(axis=kwargs['axis'],
+                                             slice=kwargs['slice'],
+                                             segmentation_settings=kwargs['segmentation_settings'])
 
         elif action_code == SegmentationListenerCode.AXIS_DID_CHANGE:
             self.__view.set_slider_limit(0, self.__model.get_range(kwargs['axis']))
+
+    def __render_images(self, **kwargs):
+        """
+        Computes the slice image and its segmentation. It is called by the render scheduler in background.
+
+        Args:
+            **kwargs: The visualization parameters: axis, slice and segmentation_settings.
+
+        Returns:
+            A tuple with the slice image, the segmented mask, the marked image and the segmentation statistics.
+        """
+        slice_image = self.__model.get_slice_image(kwargs['axis'], kwargs['slice'])
+        segmented_mask, segmented_marked = self.__model.segment_slice(kwargs['axis'], kwargs['slice'],
+                                                                      kwargs['segmentation_settings'])
+
+        return slice_image, segmented_mask, segmented_marked, self.__model.get_segmentation_statistics()
+
+    def __display_images(self, images):
+        """
+        Shows the images computed by the render scheduler.
+
+        Args:
+            images: A tuple with the slice image, the segmented mask, the marked image and the segmentation statistics.
+        """
+        slice_image, segmented_mask, segmented_marked, segmentation_statistics = images
+
+        self.__view.set_images(original_image=slice_image,
+                               mask_image=segmented_mask,
+                               marked_image=segmented_marked)
+        self.__view.set_segmentation_statistics(segmentation_statistics)
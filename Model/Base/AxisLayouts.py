@@ -0,0 +1,175 @@
+import numpy
+import os
+import threading
+
+from typing import Dict, Optional
+
+# The copies are opt-in, since each one is as large as the tensor. The variable sets their memory limit in MiB.
+MAX_SIZE_VARIABLE = 'MEDICAL_IMAGE_TOOLS_AXIS_LAYOUTS'
+
+
+def configured_max_size() -> int:
+    """
+    Returns the memory limit of the copies set in the environment.
+
+    Returns:
+        An integer, representing the limit in bytes, or 0 if the variable is not set or is not a number.
+    """
+    try:
+        return max(0, int(os.environ.get(MAX_SIZE_VARIABLE, '0'))) * 1024 ** 2
+    except ValueError:
+        return 0
+
+
+def available_memory() -> Optional[int]:
+    """
+    Returns the memory that can be allocated without swapping, as reported by the kernel.
+
+    Returns:
+        An integer, representing the available memory in bytes, or None if it is not known in this platform.
+    """
+    try:
+        with open('/proc/meminfo', 'r') as meminfo_file:
+            for line in meminfo_file:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+
+    return None
+
+
+class AxisLayouts:
+
+    # A copy is only built if, after building it, half of the available memory is left.
+    MAX_AVAILABLE_MEMORY_FRACTION = 0.5
+
+    # The axial slices are the most shown ones and the most strided in a tensor of shape (rows, columns, slices), so
+    # their copy is built first.
+    BUILD_ORDER = (2, 1)
+
+    def __init__(self, max_size: int = 0):
+        """
+        Initializes the contiguous copies of a tensor of shape (rows, columns, slices) used to read its slices.
+
+        In a C-ordered tensor, the slices tensor[i, :, :] are contiguous, but the slices tensor[:, i, :] and
+        tensor[:, :, i] are strided gathers, that read one value of each cache line. For these axes, a copy of the
+        tensor with the axis moved to the front is built in background, so every slice is a contiguous block of memory.
+        The copies are only built while their total size is within the limit and each one fits in a fraction of the
+        available memory; the slices of the axes without copy are read from the tensor. Memory-mapped tensors, as the
+        ones opened from the volume cache, are never copied, since the copies would load them completely in memory.
+
+        Args:
+            max_size: An integer, representing the maximum size of the copies in bytes. With 0, no copy is built.
+        """
+        self.__max_size = max_size
+        self.__tensor: numpy.ndarray = None
+        self.__layouts: Dict[int, numpy.ndarray] = {}
+        self.__request = 0
+        self.__lock = threading.Lock()
+
+    def set_tensor(self, tensor):
+        """
+        Sets the tensor whose slices are read, discarding the copies of the previous one. The copies of the new tensor
+        are not built until build is called.
+
+        Args:
+            tensor: The tensor, represented as a numpy array or as an object with the same indexing.
+        """
+        with self.__lock:
+            self.__request += 1
+            self.__tensor = tensor
+            self.__layouts = {}
+
+    def build(self, tensor: numpy.ndarray):
+        """
+        Sets a tensor that has been completely read, and starts building its copies in background.
+
+        Args:
+            tensor: The tensor, represented as a numpy array.
+        """
+        self.set_tensor(tensor)
+
+        with self.__lock:
+            request = self.__request
+
+        if self.__max_size > 0 and not isinstance(tensor, numpy.memmap):
+            build_thread = threading.Thread(target=self.__build_layouts, args=(request, tensor), daemon=True)
+            build_thread.start()
+
+    def __build_layouts(self, request: int, tensor: numpy.ndarray):
+        """
+        Builds the copies of the tensor that fit in the memory limits, stopping if another tensor is set meanwhile.
+
+        Args:
+            request: An integer, representing the identifier of the build.
+            tensor: The tensor, represented as a numpy array.
+        """
+        size = 0
+        for axis in self.BUILD_ORDER:
+            if request != self.__request:
+                return
+
+            size += tensor.nbytes
+            if size > self.__max_size:
+                return
+
+            free_memory = available_memory()
+            if free_memory is not None and tensor.nbytes > free_memory * self.MAX_AVAILABLE_MEMORY_FRACTION:
+                return
+
+            layout = numpy.ascontiguousarray(numpy.moveaxis(tensor, axis, 0))
+            layout.flags.writeable = False
+
+            with self.__lock:
+                if request != self.__request:
+                    return
+                self.__layouts[axis] = layout
+
+    def get_slice(self, axis: int, slice_index: int) -> numpy.ndarray:
+        """
+        Returns a slice of the tensor, from its contiguous copy if it has been built, or from the tensor otherwise.
+
+        Args:
+            axis: An integer, representing the axis.
+            slice_index: An integer, representing the index of the image in the axis.
+
+        Returns:
+            An image, represented as a numpy array with the same shape and values in both cases.
+        """
+        with self.__lock:
+            layout = self.__layouts.get(axis)
+            tensor = self.__tensor
+
+        if layout is not None:
+            return layout[slice_index]
+
+        if axis == 0:
+            return tensor[slice_index, :, :]
+        elif axis == 1:
+            return tensor[:, slice_index, :]
+        elif axis == 2:
+            return tensor[:, :, slice_index]
+
+    def has_layout(self, axis: int) -> bool:
+        """
+        Checks if the contiguous copy of an axis has been built.
+
+        Args:
+            axis: An integer, representing the axis.
+
+        Returns:
+            A boolean, indicating if the slices of the axis are read from a copy.
+        """
+        with self.__lock:
+            return axis in self.__layouts
+
+    def get_size(self) -> int:
+        """
+        Returns the memory used by the copies.
+
+        Returns:
+            An integer, representing the size in bytes.
+        """
+        with self.__lock:
+            return sum(layout.nbytes for layout in self.__layouts.values())
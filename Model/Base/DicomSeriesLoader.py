@@ -0,0 +1,391 @@
+from __future__ import annotations
+
+import numpy
+import os
+import struct
+
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from Model.Base.IntensityStatistics import IntensityStatistics
+from Model.Base.LazyModule import LazyModule
+
+pydicom = LazyModule('pydicom')
+
+# The transfer syntaxes Implicit VR Little Endian and Explicit VR Little Endian, whose pixel data is not compressed.
+UNCOMPRESSED_TRANSFER_SYNTAXES = ('1.2.840.10008.1.2', '1.2.840.10008.1.2.1')
+PIXEL_DATA_TAG = (0x7FE0, 0x0010)
+
+
+def default_workers() -> int:
+    """
+    Returns the default number of workers used to read a series.
+
+    Returns:
+        An integer, representing the number of available cores.
+    """
+    return os.cpu_count() or 1
+
+
+def create_executor(workers: int = None, use_processes: bool = False) -> Executor:
+    """
+    Creates the pool used to read and decode the files of a series.
+
+    Args:
+        workers: An integer, representing the number of workers. If None, one worker per core is used.
+        use_processes: A boolean, indicating if a process pool is used instead of a thread pool.
+
+    Returns:
+        An Executor object.
+    """
+    if workers is None:
+        workers = default_workers()
+
+    if use_processes:
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def native_dtype(header: pydicom.Dataset) -> numpy.dtype:
+    """
+    Returns the data type in which the pixel data of a DICOM file is stored.
+
+    Args:
+        header: A Dataset object, representing the header of the file.
+
+    Returns:
+        A numpy dtype, computed from the tags BitsAllocated and PixelRepresentation.
+    """
+    bits_allocated = int(getattr(header, 'BitsAllocated', 16))
+    is_signed = int(getattr(header, 'PixelRepresentation', 0)) == 1
+
+    if bits_allocated <= 8:
+        return numpy.dtype(numpy.int8 if is_signed else numpy.uint8)
+    elif bits_allocated <= 16:
+        return numpy.dtype(numpy.int16 if is_signed else numpy.uint16)
+    return numpy.dtype(numpy.int32 if is_signed else numpy.uint32)
+
+
+def check_dtype(header: pydicom.Dataset, dtype: numpy.dtype) -> numpy.dtype:
+    """
+    Checks that a data type can hold every stored value of a DICOM file, so converting its pixel data does not wrap
+    around or round any value.
+
+    Args:
+        header: A Dataset object, representing the header of the file.
+        dtype: The data type requested for the pixel data.
+
+    Returns:
+        The data type, as a numpy dtype.
+
+    Raises:
+        ValueError: If the data type cannot represent the range given by BitsStored and PixelRepresentation.
+    """
+    dtype = numpy.dtype(dtype)
+    stored_dtype = native_dtype(header)
+    bits_stored = int(getattr(header, 'BitsStored', 8 * stored_dtype.itemsize))
+
+    if stored_dtype.kind == 'i':
+        minimum, maximum = -(1 << (bits_stored - 1)), (1 << (bits_stored - 1)) - 1
+    else:
+        minimum, maximum = 0, (1 << bits_stored) - 1
+
+    if dtype.kind in 'iu':
+        fits = numpy.iinfo(dtype).min <= minimum and maximum <= numpy.iinfo(dtype).max
+    elif dtype.kind == 'f':
+        # A float represents exactly every integer up to 2 ** (mantissa bits + 1).
+        fits = bits_stored <= numpy.finfo(dtype).nmant + 1
+    elif dtype.kind == 'b':
+        fits = minimum == 0 and maximum == 1
+    else:
+        fits = False
+
+    if not fits:
+        raise ValueError("The type {0} cannot hold the stored values of the image, from {1} to {2}.".format(
+            dtype, minimum, maximum))
+
+    return dtype
+
+
+def read_header(path: str) -> pydicom.Dataset:
+    """
+    Reads the header of a DICOM file, without reading the pixel data.
+
+    Args:
+        path: A string, representing the path of the file.
+
+    Returns:
+        A Dataset object, representing the header of the file.
+    """
+    return pydicom.dcmread(path, stop_before_pixels=True)
+
+
+def read_image_header(path: str) -> Optional[pydicom.Dataset]:
+    """
+    Reads the header of a file, discarding the files that are not DICOM images.
+
+    The offset of the pixel data in the file is stored in the attribute pixel_data_offset of the header, so the
+    slices of the series can be read later without parsing the file again. It is None when the pixel data cannot be
+    read directly, as described in read_pixel_data_offset.
+
+    Args:
+        path: A string, representing the path of the file.
+
+    Returns:
+        A Dataset object, representing the header of the file, or None if the file is not a DICOM file or it does
+        not contain an image.
+    """
+    try:
+        with open(path, 'rb') as dicom_file:
+            header = pydicom.dcmread(dicom_file, stop_before_pixels=True)
+            if 'Rows' not in header or 'Columns' not in header:
+                return None
+
+            header.pixel_data_offset = read_pixel_data_offset(dicom_file, header)
+    except (pydicom.errors.InvalidDicomError, OSError):
+        return None
+
+    return header
+
+
+def read_pixel_data_offset(dicom_file, header: pydicom.Dataset) -> Optional[int]:
+    """
+    Reads the position of the value of the tag (7FE0,0010) Pixel Data, from a file whose header has just been read
+    until that tag.
+
+    The offset is only returned when the stored values can be read as they are: a single frame of one sample per
+    pixel, not compressed and in little endian.
+
+    Args:
+        dicom_file: The file object, placed at the start of the pixel data element.
+        header: A Dataset object, representing the header of the file.
+
+    Returns:
+        An integer, representing the offset in bytes of the pixel data in the file, or None if the pixel data cannot
+        be read directly.
+    """
+    file_meta = getattr(header, 'file_meta', None)
+    transfer_syntax = str(getattr(file_meta, 'TransferSyntaxUID', ''))
+    if transfer_syntax not in UNCOMPRESSED_TRANSFER_SYNTAXES:
+        return None
+
+    bits_allocated = int(getattr(header, 'BitsAllocated', 16))
+    if bits_allocated not in (8, 16, 32) or int(getattr(header, 'SamplesPerPixel', 1)) != 1 or \
+            int(getattr(header, 'NumberOfFrames', 1) or 1) != 1:
+        return None
+
+    element_header = dicom_file.read(8)
+    if len(element_header) < 8 or struct.unpack('<HH', element_header[:4]) != PIXEL_DATA_TAG:
+        return None
+
+    if transfer_syntax == UNCOMPRESSED_TRANSFER_SYNTAXES[0]:
+        length = struct.unpack('<I', element_header[4:])[0]
+    elif element_header[4:6] in (b'OB', b'OW'):
+        length_bytes = dicom_file.read(4)
+        if len(length_bytes) < 4:
+            return None
+        length = struct.unpack('<I', length_bytes)[0]
+    else:
+        length = struct.unpack('<H', element_header[6:])[0]
+
+    if length < int(header.Rows) * int(header.Columns) * bits_allocated // 8:
+        return None
+
+    return dicom_file.tell()
+
+
+def scan_headers(paths: List[str], workers: int = None) -> List[Tuple[str, pydicom.Dataset]]:
+    """
+    Reads in parallel only the headers of a list of files, and keeps the DICOM images.
+
+    Args:
+        paths: A list of strings, representing the paths of the files.
+        workers: An integer, representing the number of workers. If None, one worker per core is used.
+
+    Returns:
+        A list of tuples with the path and the header of each DICOM image, in the same order as the paths.
+    """
+    with create_executor(workers) as executor:
+        headers = list(executor.map(read_image_header, paths))
+
+    return [(path, header) for path, header in zip(paths, headers) if header is not None]
+
+
+def group_by_series(scanned_files: List[Tuple[str, pydicom.Dataset]]) -> Dict[str, List[Tuple[str, pydicom.Dataset]]]:
+    """
+    Groups the scanned files by the tag (0020,000E) Series Instance UID.
+
+    Args:
+        scanned_files: A list of tuples with the path and the header of each file.
+
+    Returns:
+        A dictionary that maps each series UID to the list of its files, keeping the order of appearance.
+    """
+    series = OrderedDict()
+    for path, header in scanned_files:
+        series_uid = str(getattr(header, 'SeriesInstanceUID', ''))
+        series.setdefault(series_uid, []).append((path, header))
+
+    return series
+
+
+def slice_position(header: pydicom.Dataset) -> float:
+    """
+    Computes the position of a slice along the normal of its plane.
+
+    The position is the projection of the tag (0020,0032) Image Position Patient on the normal defined by the tag
+    (0020,0037) Image Orientation Patient. If these tags are missing, the tags (0020,1041) Slice Location and
+    (0020,0013) Instance Number are used instead.
+
+    Args:
+        header: A Dataset object, representing the header of the file.
+
+    Returns:
+        A float, representing the position of the slice.
+    """
+    if 'ImagePositionPatient' in header and 'ImageOrientationPatient' in header:
+        orientation = numpy.array(header.ImageOrientationPatient, dtype=numpy.float64)
+        normal = numpy.cross(orientation[:3], orientation[3:])
+        return float(numpy.dot(numpy.array(header.ImagePositionPatient, dtype=numpy.float64), normal))
+    elif 'SliceLocation' in header:
+        return float(header.SliceLocation)
+
+    return float(getattr(header, 'InstanceNumber', 0) or 0)
+
+
+def sort_by_position(series_files: List[Tuple[str, pydicom.Dataset]]) -> List[Tuple[str, pydicom.Dataset]]:
+    """
+    Sorts the files of a series by the position of their slices.
+
+    Args:
+        series_files: A list of tuples with the path and the header of each file.
+
+    Returns:
+        A new list of tuples, sorted in ascending position.
+    """
+    return sorted(series_files, key=lambda scanned_file: slice_position(scanned_file[1]))
+
+
+def series_geometry(headers: List[pydicom.Dataset]) -> Tuple[List[float], List[float], List[List[float]]]:
+    """
+    Computes the physical geometry of a volume of shape (rows, columns, slices) built from a sorted series.
+
+    The spacing between rows and columns is read from the tag (0028,0030) Pixel Spacing. The spacing between
+    slices is the median distance between consecutive slice positions or, if there is a single slice, the tag
+    (0018,0088) Spacing Between Slices or (0018,0050) Slice Thickness.
+
+    Args:
+        headers: A list of Dataset objects, representing the headers of the series sorted by position.
+
+    Returns:
+        A tuple with the spacing of each axis of the volume, the position of its first voxel, and the direction
+        matrix, whose columns are the unitary directions of each axis of the volume. All of them are in the patient
+        coordinate system, in millimetres.
+    """
+    first_header = headers[0]
+
+    row_spacing, column_spacing = [float(value) for value in getattr(first_header, 'PixelSpacing', [1.0, 1.0])]
+
+    if len(headers) > 1:
+        positions = numpy.array([slice_position(header) for header in headers])
+        slice_spacing = float(numpy.median(numpy.diff(positions)))
+    else:
+        slice_spacing = 0.0
+
+    if slice_spacing <= 0:
+        slice_spacing = float(getattr(first_header, 'SpacingBetweenSlices', 0) or
+                              getattr(first_header, 'SliceThickness', 0) or 1.0)
+
+    orientation = numpy.array(getattr(first_header, 'ImageOrientationPatient', [1, 0, 0, 0, 1, 0]),
+                              dtype=numpy.float64)
+    row_direction, column_direction = orientation[:3], orientation[3:]
+    normal = numpy.cross(row_direction, column_direction)
+
+    # The row index advances along the column direction cosine, and the column index along the row direction cosine.
+    direction = numpy.stack([column_direction, row_direction, normal], axis=1)
+    origin = [float(value) for value in getattr(first_header, 'ImagePositionPatient', [0, 0, 0])]
+
+    return [row_spacing, column_spacing, slice_spacing], origin, direction.tolist()
+
+
+def decode_pixel_array(path: str) -> numpy.ndarray:
+    """
+    Reads a DICOM file and decodes its pixel data.
+
+    Args:
+        path: A string, representing the path of the file.
+
+    Returns:
+        The decoded image, represented as a numpy array.
+    """
+    return pydicom.dcmread(path).pixel_array
+
+
+def read_pixel_array(path: str, header: pydicom.Dataset) -> numpy.ndarray:
+    """
+    Reads the pixel data of a DICOM file whose header has already been read. If the header has the offset of the
+    pixel data, the stored values are read straight from the file without parsing it again, applying the same
+    masking or sign extension of the unused bits as pydicom. Otherwise, the file is decoded with pydicom.
+
+    Args:
+        path: A string, representing the path of the file.
+        header: A Dataset object, representing the header of the file, as returned by read_image_header.
+
+    Returns:
+        The decoded image, represented as a numpy array.
+    """
+    pixel_data_offset = getattr(header, 'pixel_data_offset', None)
+    if pixel_data_offset is None:
+        return decode_pixel_array(path)
+
+    rows, columns = int(header.Rows), int(header.Columns)
+    dtype = native_dtype(header).newbyteorder('<')
+    image = numpy.fromfile(path, dtype=dtype, count=rows * columns, offset=pixel_data_offset).reshape(rows, columns)
+
+    bits_stored = int(getattr(header, 'BitsStored', 8 * dtype.itemsize))
+    unused_bits = 8 * dtype.itemsize - bits_stored
+    if unused_bits > 0:
+        if dtype.kind == 'i':
+            image <<= unused_bits
+            image >>= unused_bits
+        else:
+            image &= (1 << bits_stored) - 1
+
+    return image
+
+
+def decode_series(paths: List[str], headers: List[pydicom.Dataset], volume: numpy.ndarray, workers: int = None,
+                  use_processes: bool = False, statistics: IntensityStatistics = None):
+    """
+    Decodes the pixel data of a list of DICOM files into a preallocated volume. The file in the position i of the
+    list is written into the slice volume[:, :, i], and each file is decoded only once. The headers read while
+    scanning the files are reused, so the files are not parsed again when the offset of their pixel data is known.
+
+    If statistics are given, each slice is added to them right after it is decoded, so the intensities are not read
+    again in a separate pass over the volume.
+
+    Args:
+        paths: A list of strings, representing the paths of the files, already sorted.
+        headers: A list of Dataset objects, representing the headers of the files in the same order, as returned by
+                 read_image_header.
+        volume: The preallocated volume, represented as a numpy array of shape (rows, columns, len(paths)).
+        workers: An integer, representing the number of workers. If None, one worker per core is used.
+        use_processes: A boolean, indicating if the files are decoded in a process pool. Threads write directly
+                       into the volume, whereas processes send back each decoded slice.
+        statistics: An IntensityStatistics object, where the intensities of the slices are accumulated (optional).
+    """
+    def decode_into_volume(index: int):
+        volume[:, :, index] = read_pixel_array(paths[index], headers[index])
+        if statistics is not None:
+            statistics.add(volume[:, :, index])
+
+    with create_executor(workers, use_processes) as executor:
+        if use_processes:
+            for index, pixel_array in enumerate(executor.map(read_pixel_array, paths, headers)):
+                volume[:, :, index] = pixel_array
+                if statistics is not None:
+                    statistics.add(volume[:, :, index])
+        else:
+            for _ in executor.map(decode_into_volume, range(len(paths))):
+                pass
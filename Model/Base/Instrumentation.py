@@ -0,0 +1,222 @@
+import atexit
+import collections
+import contextlib
+import functools
+import json
+import numpy
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+from typing import Callable, Dict
+
+INSTRUMENTATION_VARIABLE = 'MEDICAL_IMAGE_TOOLS_INSTRUMENTATION'
+OUTPUT_VARIABLE = 'MEDICAL_IMAGE_TOOLS_INSTRUMENTATION_OUTPUT'
+
+# The variable enables the timings with any value, and also the allocation counters with the value 'allocations'.
+MODE = os.environ.get(INSTRUMENTATION_VARIABLE, '').strip().lower()
+ENABLED = MODE not in ('', '0', 'off', 'false')
+COUNTS_ALLOCATIONS = MODE == 'allocations'
+
+ROLLING_WINDOW = 1024
+
+
+class StageStatistics:
+
+    def __init__(self):
+        """
+        Initializes the measures of a stage: the duration of its last calls, to compute rolling percentiles, and the
+        counters of all its calls.
+        """
+        self.durations = collections.deque(maxlen=ROLLING_WINDOW)
+        self.calls = 0
+        self.total_seconds = 0.0
+
+        self.measured_allocations = 0
+        self.allocated_bytes = 0
+        self.retained_bytes = 0
+
+    def get_summary(self) -> Dict[str, float]:
+        """
+        Summarizes the measures of the stage.
+
+        Returns:
+            A dictionary with the number of calls, the total time, the percentiles of the last durations in
+            milliseconds and, if they are counted, the allocations per call in bytes.
+        """
+        percentiles = numpy.percentile(numpy.array(self.durations) * 1000, [50, 90, 99, 100])
+        summary = {'calls': self.calls,
+                   'total_seconds': self.total_seconds,
+                   'p50_ms': percentiles[0],
+                   'p90_ms': percentiles[1],
+                   'p99_ms': percentiles[2],
+                   'max_ms': percentiles[3]}
+
+        if self.measured_allocations > 0:
+            summary['allocated_bytes_per_call'] = self.allocated_bytes / self.measured_allocations
+            summary['retained_bytes_per_call'] = self.retained_bytes / self.measured_allocations
+
+        return summary
+
+
+stages: Dict[str, StageStatistics] = collections.defaultdict(StageStatistics)
+stages_lock = threading.Lock()
+thread_state = threading.local()
+
+
+def timed(stage_name: str) -> Callable[[Callable], Callable]:
+    """
+    Decorator that measures each call of a function as a stage. When the instrumentation is disabled, the function is
+    returned unchanged, so it has no cost at all.
+
+    Args:
+        stage_name: A string, representing the name of the stage.
+
+    Returns:
+        The decorator.
+    """
+    def decorator(function: Callable) -> Callable:
+        if not ENABLED:
+            return function
+
+        @functools.wraps(function)
+        def timed_function(*args, **kwargs):
+            with measure(stage_name):
+                return function(*args, **kwargs)
+
+        return timed_function
+
+    return decorator
+
+
+def measure(stage_name: str):
+    """
+    Returns a context manager that measures the code inside it as a stage. When the instrumentation is disabled, it
+    returns an empty context manager.
+
+    Args:
+        stage_name: A string, representing the name of the stage.
+
+    Returns:
+        A context manager.
+    """
+    if not ENABLED:
+        return contextlib.nullcontext()
+
+    return measure_stage(stage_name)
+
+
+@contextlib.contextmanager
+def measure_stage(stage_name: str):
+    """
+    Context manager that measures the duration and, if they are counted, the allocations of the code inside it.
+
+    The allocations are the peak of memory traced by tracemalloc above the memory at the start of the stage, and the
+    memory still allocated at its end. They are only measured in the outermost stage of each thread, since measuring
+    a nested stage resets the peak of the enclosing one, and they include the allocations of other threads running
+    at the same time.
+
+    Args:
+        stage_name: A string, representing the name of the stage.
+    """
+    depth = getattr(thread_state, 'depth', 0)
+    counts_allocations = COUNTS_ALLOCATIONS and depth == 0
+    thread_state.depth = depth + 1
+
+    if counts_allocations:
+        initial_memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start_time
+        thread_state.depth = depth
+
+        if counts_allocations:
+            final_memory, peak_memory = tracemalloc.get_traced_memory()
+
+        with stages_lock:
+            stage = stages[stage_name]
+            stage.durations.append(duration)
+            stage.calls += 1
+            stage.total_seconds += duration
+
+            if counts_allocations:
+                stage.measured_allocations += 1
+                stage.allocated_bytes += peak_memory - initial_memory
+                stage.retained_bytes += final_memory - initial_memory
+
+
+def get_summary() -> Dict[str, Dict[str, float]]:
+    """
+    Summarizes the measures of all the stages.
+
+    Returns:
+        A dictionary with the summary of each stage, as returned by StageStatistics.get_summary.
+    """
+    with stages_lock:
+        return {stage_name: stage.get_summary() for stage_name, stage in sorted(stages.items())}
+
+
+def format_summary() -> str:
+    """
+    Formats the measures of all the stages as a table.
+
+    Returns:
+        A string, representing the table.
+    """
+    lines = ['{0:<36} {1:>8} {2:>10} {3:>10} {4:>10} {5:>10} {6:>14}'.format(
+        'stage', 'calls', 'p50 (ms)', 'p90 (ms)', 'p99 (ms)', 'max (ms)', 'alloc (KB)')]
+
+    for stage_name, summary in get_summary().items():
+        allocated = summary.get('allocated_bytes_per_call')
+        lines.append('{0:<36} {1:>8} {2:>10.2f} {3:>10.2f} {4:>10.2f} {5:>10.2f} {6:>14}'.format(
+            stage_name, summary['calls'], summary['p50_ms'], summary['p90_ms'], summary['p99_ms'], summary['max_ms'],
+            '' if allocated is None else '{0:.1f}'.format(allocated / 1024)))
+
+    return '\n'.join(lines)
+
+
+def dump_json(path: str):
+    """
+    Writes the measures of all the stages in a JSON file.
+
+    Args:
+        path: A string, representing the path of the file.
+    """
+    with open(path, 'w') as output_file:
+        json.dump(get_summary(), output_file, indent=2)
+
+
+def reset():
+    """
+    Removes the measures of all the stages.
+    """
+    with stages_lock:
+        stages.clear()
+
+
+def dump_at_exit():
+    """
+    Writes the measures when the program ends: in the JSON file of the output variable if it is set, or in the
+    standard error otherwise.
+    """
+    if len(stages) == 0:
+        return
+
+    output_path = os.environ.get(OUTPUT_VARIABLE)
+    if output_path:
+        dump_json(output_path)
+    else:
+        print(format_summary(), file=sys.stderr)
+
+
+if ENABLED:
+    if COUNTS_ALLOCATIONS:
+        tracemalloc.start()
+
+    atexit.register(dump_at_exit)
@@ -0,0 +1,165 @@
+import numpy
+import threading
+
+from typing import Dict, Tuple
+
+
+class IntensityStatistics:
+
+    DEFAULT_BINS = 4096
+
+    def __init__(self, dtype: numpy.dtype):
+        """
+        Initializes the statistics of the intensities of a volume, accumulated slice by slice while it is decoded.
+
+        For integer types of up to 16 bits, the histogram has one bin per value, so it is computed while the slices
+        are decoded and the percentiles are exact. For other types, only the minimum and the maximum are accumulated
+        while decoding, and the histogram is computed with DEFAULT_BINS bins between them when the volume is finished.
+
+        Args:
+            dtype: The data type of the volume.
+        """
+        self.__dtype = numpy.dtype(dtype)
+        self.__lock = threading.Lock()
+
+        self.__has_exact_histogram = self.__dtype.kind in 'iub' and self.__dtype.itemsize <= 2
+        if self.__has_exact_histogram:
+            self.__first_value = int(numpy.iinfo(self.__dtype).min) if self.__dtype.kind != 'b' else 0
+            self.__histogram = numpy.zeros(2 ** (8 * self.__dtype.itemsize), dtype=numpy.int64)
+        else:
+            self.__first_value = 0
+            self.__histogram = None
+
+        self.__bin_width = 1.0
+        self.minimum = None
+        self.maximum = None
+        self.count = 0
+
+    def add(self, image: numpy.ndarray):
+        """
+        Adds the intensities of a slice. It can be called from several threads at the same time.
+
+        Args:
+            image: A slice of the volume, represented as a numpy array.
+        """
+        if image.size == 0:
+            return
+
+        minimum, maximum = image.min(), image.max()
+        histogram = None
+        if self.__has_exact_histogram:
+            values = numpy.ravel(image).astype(numpy.int64)
+            values -= self.__first_value
+            histogram = numpy.bincount(values, minlength=self.__histogram.shape[0])
+
+        with self.__lock:
+            self.minimum = minimum if self.minimum is None else min(self.minimum, minimum)
+            self.maximum = maximum if self.maximum is None else max(self.maximum, maximum)
+            self.count += image.size
+
+            if histogram is not None:
+                self.__histogram += histogram
+
+    def finish(self, volume: numpy.ndarray):
+        """
+        Completes the statistics once all the slices have been added. The histogram is trimmed to the range of the
+        volume or, if it could not be accumulated while decoding, computed from the volume.
+
+        Args:
+            volume: The whole volume, represented as a numpy array.
+        """
+        if self.count == 0:
+            return
+
+        if self.__has_exact_histogram:
+            first_bin = int(self.minimum) - self.__first_value
+            last_bin = int(self.maximum) - self.__first_value
+            self.__histogram = self.__histogram[first_bin:last_bin + 1]
+            self.__first_value = int(self.minimum)
+        else:
+            self.__histogram, bin_edges = numpy.histogram(volume, bins=self.DEFAULT_BINS,
+                                                          range=(float(self.minimum), float(self.maximum)))
+            self.__first_value = float(bin_edges[0])
+            self.__bin_width = float(bin_edges[1] - bin_edges[0])
+
+        self.minimum = self.minimum.item()
+        self.maximum = self.maximum.item()
+
+    def get_histogram(self) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Returns the histogram of the intensities.
+
+        Returns:
+            A tuple with the number of voxels in each bin and the lower value of each bin, represented as numpy
+            arrays.
+        """
+        values = self.__first_value + self.__bin_width * numpy.arange(self.__histogram.shape[0])
+        return self.__histogram, values
+
+    def get_percentile(self, percentile: float) -> float:
+        """
+        Computes a percentile of the intensities from the histogram, without reading the volume.
+
+        Args:
+            percentile: A float between 0 and 100, representing the percentile.
+
+        Returns:
+            A float, representing the lower value of the bin that contains the percentile.
+        """
+        cumulative_histogram = numpy.cumsum(self.__histogram)
+        position = int(numpy.searchsorted(cumulative_histogram, cumulative_histogram[-1] * percentile / 100))
+        position = min(position, cumulative_histogram.shape[0] - 1)
+
+        return self.__first_value + self.__bin_width * position
+
+    def get_window(self, lower_percentile: float = 1.0, upper_percentile: float = 99.0) -> Tuple[float, float]:
+        """
+        Suggests a window that contains most of the intensities of the volume.
+
+        Args:
+            lower_percentile: A float, representing the percentile mapped to black.
+            upper_percentile: A float, representing the percentile mapped to white.
+
+        Returns:
+            A tuple with the center (level) and the width of the window, as used by Utils.apply_window.
+        """
+        lower_value = self.get_percentile(lower_percentile)
+        upper_value = self.get_percentile(upper_percentile)
+
+        return (lower_value + upper_value) / 2, max(upper_value - lower_value, 1)
+
+    def to_dict(self) -> Dict:
+        """
+        Returns the finished statistics as a dictionary that can be serialized as JSON.
+
+        Returns:
+            A dictionary with the minimum, the maximum, the number of voxels and the histogram.
+        """
+        return {'dtype': self.__dtype.str,
+                'minimum': self.minimum,
+                'maximum': self.maximum,
+                'count': self.count,
+                'first_value': self.__first_value,
+                'bin_width': self.__bin_width,
+                'histogram': self.__histogram.tolist()}
+
+    @classmethod
+    def from_dict(cls, values: Dict) -> 'IntensityStatistics':
+        """
+        Restores the statistics returned by to_dict.
+
+        Args:
+            values: A dictionary, as returned by to_dict.
+
+        Returns:
+            An IntensityStatistics object.
+        """
+        statistics = cls(numpy.dtype(values['dtype']))
+        statistics.minimum = values['minimum']
+        statistics.maximum = values['maximum']
+        statistics.count = values['count']
+        statistics.__first_value = values['first_value']
+        statistics.__bin_width = values['bin_width']
+        statistics.__histogram = numpy.array(values['histogram'], dtype=numpy.int64)
+
+        return statistics
@@ -0,0 +1,35 @@
+import importlib
+
+from types import ModuleType
+
+
+class LazyModule:
+
+    def __init__(self, name: str):
+        """
+        Initializes a module that is imported the first time one of its attributes is used.
+
+        The image libraries (cv2, SimpleITK and pydicom) take most of the import time of the model, and many uses of
+        the model only need some of them, so they are referenced through this object instead of being imported with
+        the model.
+
+        Args:
+            name: A string, representing the name of the module, as in an import statement.
+        """
+        self.__name = name
+        self.__module: ModuleType = None
+
+    def __getattr__(self, attribute: str):
+        """
+        Returns an attribute of the module, importing it if it has not been imported yet.
+
+        Args:
+            attribute: A string, representing the name of the attribute.
+
+        Returns:
+            The attribute of the module.
+        """
+        if self.__module is None:
+            self.__module = importlib.import_module(self.__name)
+
+        return getattr(self.__module, attribute)
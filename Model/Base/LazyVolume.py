@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import numpy
+import threading
+
+from typing import Callable, List, Optional
+
+from Model.Base import DicomSeriesLoader
+from Model.Base.IntensityStatistics import IntensityStatistics
+from Model.Base.LazyModule import LazyModule
+from Model.Base.SliceCache import SliceCache
+
+pydicom = LazyModule('pydicom')
+
+
+class LazyVolume:
+
+    DEFAULT_CACHE_SIZE = 64 * 1024 ** 2
+
+    def __init__(self, files_paths: List[str], headers: List[pydicom.Dataset], dtype: numpy.dtype,
+                 cache_size: int = DEFAULT_CACHE_SIZE):
+        """
+        Initializes a volume of shape (rows, columns, slices) whose slices are read from a sorted series on demand.
+
+        The axial slices, indexed as volume[:, :, index], are read from their file as soon as they are requested, using
+        the offset of the pixel data found while scanning the headers, and kept in a cache with a memory budget. The
+        whole volume is filled by a background pass started with start_filling; any other indexing, and the conversion
+        to a numpy array, waits until the volume is filled.
+
+        Args:
+            files_paths: A list of strings, representing the paths of the files, sorted by position.
+            headers: A list of Dataset objects, representing the headers of the files, as returned by
+                     DicomSeriesLoader.read_image_header.
+            dtype: The data type of the volume.
+            cache_size: An integer, representing the memory budget in bytes of the slices read on demand.
+        """
+        self.__files_paths = files_paths
+        self.__headers = headers
+
+        self.dtype = numpy.dtype(dtype)
+        self.shape = (int(headers[0].Rows), int(headers[0].Columns), len(files_paths))
+        self.ndim = 3
+        self.size = int(numpy.prod(self.shape))
+        self.nbytes = self.size * self.dtype.itemsize
+
+        self.statistics = IntensityStatistics(self.dtype)
+
+        self.__slice_cache = SliceCache(cache_size)
+        self.__volume: numpy.ndarray = None
+        self.__filled_slices = numpy.zeros(self.shape[2], dtype=numpy.bool_)
+        self.__filled = threading.Event()
+        self.__filling_error: Exception = None
+
+    def start_filling(self, workers: int = None,
+                      on_filled: Callable[[LazyVolume, Optional[Exception]], None] = None):
+        """
+        Starts the background pass that reads all the slices into the volume and accumulates their statistics.
+
+        Args:
+            workers: An integer, representing the number of workers that read the files. If None, one worker per core
+                     is used.
+            on_filled: A Callable method that receives the volume and the error that stopped the pass, or None if all
+                       the slices have been read (optional). It is called in the background thread when the pass
+                       ends, whether it fails or not.
+        """
+        filling_thread = threading.Thread(target=self.__fill, args=(workers, on_filled), daemon=True)
+        filling_thread.start()
+
+    def __fill(self, workers: int, on_filled: Callable[[LazyVolume, Optional[Exception]], None]):
+        """
+        Reads all the slices into the volume, and finishes the statistics.
+
+        Args:
+            workers: An integer, representing the number of workers that read the files.
+            on_filled: A Callable method that receives the volume and the error of the pass, if any, or None.
+        """
+        def read_into_volume(index: int):
+            volume[:, :, index] = self.__read_slice(index)
+            self.statistics.add(volume[:, :, index])
+            self.__filled_slices[index] = True
+
+        try:
+            volume = numpy.empty(self.shape, dtype=self.dtype)
+            self.__volume = volume
+
+            with DicomSeriesLoader.create_executor(workers) as executor:
+                for _ in executor.map(read_into_volume, range(self.shape[2])):
+                    pass
+
+            self.statistics.finish(volume)
+            self.__slice_cache.clear()
+        except Exception as exception:
+            self.__filling_error = exception
+        finally:
+            self.__filled.set()
+
+        if on_filled is not None:
+            on_filled(self, self.__filling_error)
+
+    def __read_slice(self, index: int) -> numpy.ndarray:
+        """
+        Reads an axial slice from its file.
+
+        Args:
+            index: An integer, representing the index of the slice.
+
+        Returns:
+            The slice, represented as a numpy array of the type of the volume.
+        """
+        image = DicomSeriesLoader.read_pixel_array(self.__files_paths[index], self.__headers[index])
+        return image.astype(self.dtype, copy=False)
+
+    def is_filled(self) -> bool:
+        """
+        Checks if the background pass has read all the slices.
+
+        Returns:
+            A boolean, indicating if the volume is filled.
+        """
+        return self.__filled.is_set() and self.__filling_error is None
+
+    def wait_until_filled(self) -> numpy.ndarray:
+        """
+        Waits until the background pass has read all the slices.
+
+        Returns:
+            The whole volume, represented as a numpy array.
+        """
+        self.__filled.wait()
+        if self.__filling_error is not None:
+            raise self.__filling_error
+
+        return self.__volume
+
+    def get_axial_slice(self, index: int) -> numpy.ndarray:
+        """
+        Returns an axial slice, from the volume if it has already been filled or from its file otherwise.
+
+        Args:
+            index: An integer, representing the index of the slice. Negative indexes count from the last slice.
+
+        Returns:
+            The slice, represented as a numpy array of shape (rows, columns).
+        """
+        if index < 0:
+            index += self.shape[2]
+        if not 0 <= index < self.shape[2]:
+            raise IndexError('The slice {0} is out of the volume with {1} slices.'.format(index, self.shape[2]))
+
+        if self.__filled_slices[index]:
+            return self.__volume[:, :, index]
+
+        image = self.__slice_cache.get(index)
+        if image is None:
+            image = self.__read_slice(index)
+            self.__slice_cache.put(index, image)
+
+        return image
+
+    def __getitem__(self, key):
+        """
+        Indexes the volume like a numpy array. The axial slices are read on demand; any other indexing waits until
+        the volume is filled.
+
+        Args:
+            key: The index, as accepted by a numpy array.
+
+        Returns:
+            The indexed region, represented as a numpy array.
+        """
+        if isinstance(key, tuple) and len(key) == 3 and key[0] == slice(None) and key[1] == slice(None) and \
+                isinstance(key[2], (int, numpy.integer)):
+            return self.get_axial_slice(int(key[2]))
+
+        return self.wait_until_filled()[key]
+
+    def __array__(self, dtype=None, copy=None):
+        """
+        Converts the volume to a numpy array, waiting until it is filled, following the protocol of numpy 2.
+
+        Args:
+            dtype: The data type of the array (optional). If None, the type of the volume is kept.
+            copy: A boolean, indicating if the array must be a copy of the volume. If None or False, the volume is
+                  returned without copying it when the type does not change.
+
+        Returns:
+            The whole volume, represented as a numpy array.
+        """
+        volume = self.wait_until_filled()
+        if dtype is not None:
+            return volume.astype(dtype, copy=bool(copy))
+
+        if copy:
+            return volume.copy()
+
+        return volume
+
+    def __len__(self) -> int:
+        """
+        Returns the length of the first axis, as a numpy array.
+
+        Returns:
+            An integer, representing the number of rows.
+        """
+        return self.shape[0]
@@ -1,49 +1,315 @@
-from os import listdir
+from os import listdir, path as os_path
 
 import numpy
-import pydicom
+
+from typing import Callable, List, Optional, Tuple
+
+from Model.Base import DicomSeriesLoader, Instrumentation
+from Model.Base.IntensityStatistics import IntensityStatistics
+from Model.Base.LazyModule import LazyModule
+from Model.Base.LazyVolume import LazyVolume
+from Model.Base.VolumeCache import VolumeCache
+
+pydicom = LazyModule('pydicom')
 
 
 class SelectedFile:
 
-    def __init__(self, is_file: bool, path: str):
+    def __init__(self, is_file: bool, path: str, workers: int = None, use_processes: bool = False,
+                 dtype: numpy.dtype = None, series_uid: str = None, cache: VolumeCache = None, lazy: bool = False):
+        """
+        Initializes the object that represents a DICOM file or a folder of DICOM files.
 
+        Args:
+            is_file: A boolean, indicating if the path is a single file or a folder.
+            path: A string, representing the path of the file or folder.
+            workers: An integer, representing the number of workers used to read a folder (optional).
+            use_processes: A boolean, indicating if a folder is decoded in a process pool instead of a thread pool.
+            dtype: The data type of the image tensor (optional). If None, the type in which the pixel data is
+                   stored is kept. Reading fails with a ValueError if the type cannot hold the stored values.
+            series_uid: A string, representing the series to read when the folder contains several series
+                        (optional). If None, the series with more images is read.
+            cache: A VolumeCache object, used to reopen a folder that has already been read (optional).
+            lazy: A boolean, indicating if the slices of a folder are read on demand, as described in read.
+        """
         self.__is_file = is_file
         self.__path = path
 
+        self.__workers = workers
+        self.__use_processes = use_processes
+        self.__dtype = dtype
+        self.__series_uid = series_uid
+        self.__cache = cache
+        self.__lazy = lazy
+
         self.dicom_file = None
+        self.series_uids = []
+        self.series_uid: str = None
+        self.files_paths = []
         self.image_tensor = None
+        self.statistics: IntensityStatistics = None
+
+        self.spacing: List[float] = None
+        self.origin: List[float] = None
+        self.direction: List[List[float]] = None
+
+        self.rescale_slope: float = 1.0
+        self.rescale_intercept: float = 0.0
+
+    def get_path(self) -> str:
+        """
+        Returns the path of the file or folder.
 
-    def read(self):
+        Returns:
+            A string, representing the path.
+        """
+        return self.__path
+
+    def is_file(self) -> bool:
+        """
+        Checks if the path is a single file.
+
+        Returns:
+            A boolean, indicating if the path is a single file or a folder.
+        """
+        return self.__is_file
+
+    @Instrumentation.timed('SelectedFile.read')
+    def read(self, on_volume_read: Callable[[Optional[Exception]], None] = None):
         """
         Reads the DICOM file depending if the path is a file or a folder.
+
+        Besides the image tensor, the spacing, origin and direction of its axes are read from the headers, so each
+        voxel can be placed in the patient coordinate system. The minimum, maximum and histogram of the stored values
+        are computed while the pixel data is decoded.
+
+        If the folder is read lazily, only the headers are read here: the image tensor is a LazyVolume whose axial
+        slices are read on demand, and the whole tensor and its statistics are read in background. When they are
+        read, the image tensor is replaced by the numpy array and on_volume_read is called. If the background read
+        fails, the image tensor is kept lazy, so only its axial slices can be read, and on_volume_read receives the
+        error.
+
+        Args:
+            on_volume_read: A Callable method that receives the error of the background read, or None if the tensor
+                            has been completely read (optional). It is called in a background thread, and only for a
+                            folder read lazily; if the tensor is read before returning, which can be checked with
+                            is_volume_read, it is not called.
         """
         if self.__is_file:
             self.__read_file()
         else:
-            self.__read_folder()
+            self.__read_folder(on_volume_read)
+
+        self.rescale_slope = float(getattr(self.dicom_file, 'RescaleSlope', 1.0))
+        self.rescale_intercept = float(getattr(self.dicom_file, 'RescaleIntercept', 0.0))
 
     def __read_file(self):
         """
         Reads the selected file.
         """
-        self.dicom_file = pydicom.read_file(self.__path)
+        self.dicom_file = pydicom.dcmread(self.__path)
         self.image_tensor = self.dicom_file.pixel_array
 
-    def __read_folder(self):
+        self.files_paths = [self.__path]
+        self.series_uid = str(getattr(self.dicom_file, 'SeriesInstanceUID', ''))
+        self.series_uids = [self.series_uid]
+        self.spacing, self.origin, self.direction = DicomSeriesLoader.series_geometry([self.dicom_file])
+
+        if self.image_tensor.ndim == 3:
+            # The frames of a multi-frame file are stored in the first axis of the tensor.
+            self.spacing = [self.spacing[2], self.spacing[0], self.spacing[1]]
+            self.direction = numpy.array(self.direction)[:, [2, 0, 1]].tolist()
+
+        if self.__dtype is not None:
+            dtype = DicomSeriesLoader.check_dtype(self.dicom_file, self.__dtype)
+            self.image_tensor = self.image_tensor.astype(dtype, copy=False)
+
+        self.statistics = IntensityStatistics(self.image_tensor.dtype)
+        self.statistics.add(self.image_tensor)
+        self.statistics.finish(self.image_tensor)
+
+    def __read_folder(self, on_volume_read: Callable[[Optional[Exception]], None]):
         """
         Reads all the DICOM files in the folder.
+
+        Only the headers are read first, to discard the files that are not DICOM images, to group the files by series
+        and to sort the slices by their position. Then, the pixel data of each file of the series is decoded in
+        parallel straight into the preallocated tensor, in the final order, or in background if the folder is read
+        lazily.
+
+        If a cache is set and the folder has not changed since it was stored, the tensor is reopened from the cache as
+        a read-only memory map instead.
+
+        Args:
+            on_volume_read: A Callable method that receives the error of the background read of a lazy folder, or
+                            None.
         """
         files_list = sorted(listdir(self.__path))
-        pydicom_files = [pydicom.read_file(self.__path+'/'+file) for file in files_list]
-        pydicom_files.sort(key=lambda x: x[0x0020, 0x1041]._value, reverse=False)
+        files_paths = [self.__path + '/' + file for file in files_list if os_path.isfile(self.__path + '/' + file)]
+
+        cache_key = None
+        if self.__cache is not None:
+            cache_key = self.__cache.compute_key(self.__path, files_paths, self.__series_uid, self.__dtype)
+            if self.__read_cached_folder(cache_key):
+                return
+
+        scanned_files = DicomSeriesLoader.scan_headers(files_paths, workers=self.__workers)
+        if len(scanned_files) == 0:
+            raise ValueError("The folder {0} does not contain any DICOM image.".format(self.__path))
+
+        series = DicomSeriesLoader.group_by_series(scanned_files)
+        self.series_uids = list(series.keys())
+
+        if self.__series_uid is not None:
+            if self.__series_uid not in series:
+                raise ValueError("The series {0} is not in the folder {1}.".format(self.__series_uid, self.__path))
+            series_uid = self.__series_uid
+        else:
+            series_uid = max(self.series_uids, key=lambda uid: len(series[uid]))
+
+        series_files = DicomSeriesLoader.sort_by_position(series[series_uid])
+        files_paths = [file_path for file_path, _ in series_files]
+        headers = [header for _, header in series_files]
+
+        self.dicom_file = series_files[0][1]
+        self.series_uid = series_uid
+        self.files_paths = files_paths
+        self.spacing, self.origin, self.direction = DicomSeriesLoader.series_geometry(headers)
+
+        if self.__dtype is not None:
+            for header in headers:
+                dtype = DicomSeriesLoader.check_dtype(header, self.__dtype)
+        else:
+            dtype = DicomSeriesLoader.native_dtype(self.dicom_file)
+
+        if self.__lazy:
+            self.image_tensor = LazyVolume(files_paths, headers, dtype)
+            self.statistics = self.image_tensor.statistics
+            self.image_tensor.start_filling(workers=self.__workers,
+                                            on_filled=lambda volume, error: self.__did_fill_volume(
+                                                volume, error, cache_key, on_volume_read))
+            return
 
-        self.dicom_file = pydicom_files[0]
-        tensor = numpy.zeros((self.dicom_file.pixel_array.shape[0],
-                              self.dicom_file.pixel_array.shape[1],
-                              len(files_list)))
+        tensor = numpy.zeros((self.dicom_file.Rows,
+                              self.dicom_file.Columns,
+                              len(files_paths)), dtype=dtype)
 
-        for file_index, file in enumerate(pydicom_files):
-                tensor[:, :, file_index] = file.pixel_array
+        statistics = IntensityStatistics(dtype)
+        DicomSeriesLoader.decode_series(files_paths, headers, tensor, workers=self.__workers,
+                                        use_processes=self.__use_processes, statistics=statistics)
+        statistics.finish(tensor)
 
         self.image_tensor = tensor
+        self.statistics = statistics
+        self.__store_in_cache(cache_key)
+
+    def __did_fill_volume(self, volume: LazyVolume, error: Optional[Exception], cache_key: str,
+                          on_volume_read: Callable[[Optional[Exception]], None]):
+        """
+        Replaces the lazy image tensor by the volume read in background, and stores it in the cache.
+
+        Args:
+            volume: The LazyVolume object whose background read has ended.
+            error: The error that stopped the background read, or None if the volume is filled.
+            cache_key: A string, representing the key of the folder in the cache, or None.
+            on_volume_read: A Callable method that receives the error, called once the tensor is replaced, or None.
+        """
+        if self.image_tensor is not volume:
+            return
+
+        if error is None:
+            self.image_tensor = volume.wait_until_filled()
+            self.__store_in_cache(cache_key)
+
+        if on_volume_read is not None:
+            on_volume_read(error)
+
+    def __store_in_cache(self, cache_key: str):
+        """
+        Stores the image tensor and its metadata in the cache, if it is set.
+
+        Args:
+            cache_key: A string, representing the key of the folder in the cache.
+        """
+        if self.__cache is not None:
+            self.__cache.store(cache_key, self.image_tensor, {'files_paths': self.files_paths,
+                                                              'series_uid': self.series_uid,
+                                                              'series_uids': self.series_uids,
+                                                              'spacing': self.spacing,
+                                                              'origin': self.origin,
+                                                              'direction': self.direction,
+                                                              'statistics': self.statistics.to_dict()})
+
+    def __read_cached_folder(self, cache_key: str) -> bool:
+        """
+        Reads the folder from the cache.
+
+        Args:
+            cache_key: A string, representing the key of the folder in the cache.
+
+        Returns:
+            A boolean, indicating if the folder was found in the cache.
+        """
+        cached_volume = self.__cache.load(cache_key)
+        if cached_volume is None:
+            return False
+
+        image_tensor, metadata = cached_volume
+        if 'files_paths' not in metadata or 'spacing' not in metadata or 'statistics' not in metadata:
+            return False
+
+        self.image_tensor = image_tensor
+        self.files_paths = metadata['files_paths']
+        self.series_uid = metadata['series_uid']
+        self.series_uids = metadata['series_uids']
+        self.spacing, self.origin, self.direction = metadata['spacing'], metadata['origin'], metadata['direction']
+        self.statistics = IntensityStatistics.from_dict(metadata['statistics'])
+        self.dicom_file = DicomSeriesLoader.read_header(self.files_paths[0])
+
+        return True
+
+    def get_pixel_spacing(self, axis: int) -> Tuple[float, float]:
+        """
+        Returns the spacing of the pixels of the slices of the image tensor in an axis.
+
+        Args:
+            axis: An integer, representing the axis.
+
+        Returns:
+            A tuple with the spacing of the rows and of the columns of the slices, in millimetres.
+        """
+        row_spacing, column_spacing = [spacing for spacing_axis, spacing in enumerate(self.spacing)
+                                       if spacing_axis != axis]
+        return row_spacing, column_spacing
+
+    def get_display_window(self) -> Optional[Tuple[float, float]]:
+        """
+        Returns the window used to show the image tensor: the one between the percentiles 1 and 99 of its
+        intensities.
+
+        Returns:
+            A tuple with the center (level) and the width of the window, or None while a folder read lazily has not been
+            completely read, since its statistics are not complete yet.
+        """
+        if not self.is_volume_read() or self.statistics is None or self.statistics.count == 0:
+            return None
+
+        return self.statistics.get_window()
+
+    def is_volume_read(self) -> bool:
+        """
+        Checks if the whole image tensor has been read, which is only false while a folder is read lazily.
+
+        Returns:
+            A boolean, indicating if the image tensor and its statistics are complete.
+        """
+        return not isinstance(self.image_tensor, LazyVolume)
+
+    def has_rescale(self) -> bool:
+        """
+        Checks if the stored values must be rescaled to obtain the modality values.
+
+        Returns:
+            A boolean, indicating if the rescale slope or intercept are not the identity.
+        """
+        return self.rescale_slope != 1.0 or self.rescale_intercept != 0.0
@@ -0,0 +1,95 @@
+import numpy
+import threading
+
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class SliceCache:
+
+    DEFAULT_MAX_SIZE = 64 * 1024 ** 2
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        """
+        Initializes a thread-safe cache of rendered slices with a memory budget. When the budget is exceeded, the
+        least recently used slices are removed.
+
+        Args:
+            max_size: An integer, representing the maximum size of the cached slices in bytes.
+        """
+        self.__max_size = max_size
+        self.__size = 0
+        self.__slices = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[numpy.ndarray]:
+        """
+        Returns a cached slice and marks it as the most recently used.
+
+        Args:
+            key: The key of the slice.
+
+        Returns:
+            The slice, represented as a read-only numpy array, or None if it is not cached.
+        """
+        with self.__lock:
+            image = self.__slices.get(key)
+            if image is not None:
+                self.__slices.move_to_end(key)
+
+            return image
+
+    def contains(self, key: Hashable) -> bool:
+        """
+        Checks if a slice is cached, without modifying its position.
+
+        Args:
+            key: The key of the slice.
+
+        Returns:
+            A boolean, indicating if the slice is cached.
+        """
+        with self.__lock:
+            return key in self.__slices
+
+    def put(self, key: Hashable, image: numpy.ndarray):
+        """
+        Stores a slice. The slice is marked as read-only, since it is shared by all the readers of the cache.
+
+        Args:
+            key: The key of the slice.
+            image: The slice, represented as a numpy array.
+        """
+        if image.nbytes > self.__max_size:
+            return
+
+        image.flags.writeable = False
+
+        with self.__lock:
+            previous_image = self.__slices.pop(key, None)
+            if previous_image is not None:
+                self.__size -= previous_image.nbytes
+
+            self.__slices[key] = image
+            self.__size += image.nbytes
+
+            while self.__size > self.__max_size:
+                _, evicted_image = self.__slices.popitem(last=False)
+                self.__size -= evicted_image.nbytes
+
+    def clear(self):
+        """
+        Removes all the cached slices.
+        """
+        with self.__lock:
+            self.__slices.clear()
+            self.__size = 0
+
+    def get_size(self) -> int:
+        """
+        Returns the memory used by the cached slices.
+
+        Returns:
+            An integer, representing the size in bytes.
+        """
+        return self.__size
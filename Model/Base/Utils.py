@@ -1,30 +1,36 @@
-import cv2
+import functools
 import numpy
 
 from typing import Tuple
 
+from Model.Base import Instrumentation
+from Model.Base.LazyModule import LazyModule
 
-def resize_image(image: numpy.ndarray, size: Tuple[int, int], background_color: int = 0) -> numpy.ndarray:
+cv2 = LazyModule('cv2')
+
+RESIZABLE_DTYPES = (numpy.uint8, numpy.uint16, numpy.int16, numpy.float32, numpy.float64)
+
+
+def compute_fitted_size(shape: Tuple[int, ...], size: Tuple[int, int],
+                        pixel_spacing: Tuple[float, float] = None) -> Tuple[Tuple[int, int], Tuple[int, int, int, int]]:
     """
-    Resizes one image and crops with a certain color the missing space.
+    Computes the size of an image fitted into a new size keeping its aspect ratio, and the padding around it.
 
     Args:
-        image: An image, represented as a numpy array.
+        shape: A tuple, representing the shape of the image.
         size: A tuple of two elements, representing the new size.
-        background_color: An integer, representing the grayscale color.
+        pixel_spacing: A tuple of two floats, representing the spacing of the rows and of the columns of the image
+                       (optional). If None, the pixels are considered square.
 
     Returns:
-        A resized image.
+        A tuple with the height and width of the fitted image, and the padding at its top, bottom, left and right.
     """
-    height, width = image.shape[:2]
+    height, width = shape[:2]
     conv_height, conv_width = size
 
-    if height > conv_height or width > conv_width:
-        interpolation_method = cv2.INTER_AREA
-    else:
-        interpolation_method = cv2.INTER_CUBIC
-
     aspect = width / height
+    if pixel_spacing is not None:
+        aspect *= pixel_spacing[1] / pixel_spacing[0]
 
     if aspect > 1:
         new_width = conv_width
@@ -45,7 +51,61 @@ def resize_image(image: numpy.ndarray, size: Tuple[int, int], background_color:
         new_height, new_width = conv_height, conv_width
         padding_left, padding_right, padding_top, padding_bottom = 0, 0, 0, 0
 
-    if len(image.shape) is 3 and not isinstance(background_color, (list, tuple, numpy.ndarray)):
+    return (int(new_height), int(new_width)), (int(padding_top), int(padding_bottom), int(padding_left),
+                                               int(padding_right))
+
+
+def choose_interpolation(shape: Tuple[int, ...], new_size: Tuple[int, int]) -> int:
+    """
+    Chooses the interpolation used to resize an image: area interpolation to shrink it and bicubic interpolation to
+    enlarge it.
+
+    Args:
+        shape: A tuple, representing the shape of the image.
+        new_size: A tuple of two elements, representing the height and width of the resized image.
+
+    Returns:
+        An integer, representing the OpenCV interpolation flag.
+    """
+    if shape[0] > new_size[0] or shape[1] > new_size[1]:
+        return cv2.INTER_AREA
+    return cv2.INTER_CUBIC
+
+
+@Instrumentation.timed('Utils.resize_image')
+def resize_image(image: numpy.ndarray, size: Tuple[int, int], background_color: int = 0,
+                 interpolation_method: int = None, pixel_spacing: Tuple[float, float] = None) -> numpy.ndarray:
+    """
+    Resizes one image and crops with a certain color the missing space.
+
+    If the spacing of the pixels is given, the aspect ratio is computed from the physical size of the image, so the
+    reformatted slices of an anisotropic volume are not squashed. The aspect correction and the fitting to the new
+    size are done by the same interpolation.
+
+    Args:
+        image: An image, represented as a numpy array. Types not supported by OpenCV (for example, int32 or
+               boolean images) are converted to float32.
+        size: A tuple of two elements, representing the new size.
+        background_color: An integer, representing the grayscale color.
+        interpolation_method: An OpenCV interpolation flag (optional). If None, area interpolation is used to shrink
+                              the image and bicubic interpolation to enlarge it.
+        pixel_spacing: A tuple of two floats, representing the spacing of the rows and of the columns of the image
+                       (optional). If None, the pixels are considered square.
+
+    Returns:
+        A resized image.
+    """
+    if image.dtype not in RESIZABLE_DTYPES:
+        image = image.astype(numpy.float32)
+
+    height, width = image.shape[:2]
+    (new_height, new_width), (padding_top, padding_bottom, padding_left, padding_right) = \
+        compute_fitted_size(image.shape, size, pixel_spacing)
+
+    if interpolation_method is None:
+        interpolation_method = choose_interpolation(image.shape, (new_height, new_width))
+
+    if image.ndim == 3 and not isinstance(background_color, (list, tuple, numpy.ndarray)):
         background_color = [background_color] * 3
 
     scaled_img = cv2.resize(image, (new_width, new_height), interpolation=interpolation_method)
@@ -53,3 +113,131 @@ def resize_image(image: numpy.ndarray, size: Tuple[int, int], background_color:
                                     borderType=cv2.BORDER_CONSTANT, value=background_color)
 
     return scaled_img
+
+
+def resize_mask(mask: numpy.ndarray, size: Tuple[int, int], pixel_spacing: Tuple[float, float] = None) -> numpy.ndarray:
+    """
+    Resizes a binary mask to be shown, keeping it binary.
+
+    Args:
+        mask: A mask, represented as a boolean numpy array.
+        size: A tuple of two elements, representing the new size.
+        pixel_spacing: A tuple of two floats, representing the spacing of the rows and of the columns (optional), as
+                       in resize_image.
+
+    Returns:
+        A uint8 image with 255 in the marked pixels and 0 elsewhere, including the padding.
+    """
+    return resize_image(mask.astype(numpy.uint8) * 255, size, background_color=0,
+                        interpolation_method=cv2.INTER_NEAREST, pixel_spacing=pixel_spacing)
+
+
+def apply_window(image: numpy.ndarray, window_level: Tuple[float, float]) -> numpy.ndarray:
+    """
+    Maps the values of an image to grayscale with a window, as in the DICOM VOI LUT function.
+
+    Args:
+        image: An image, represented as a numpy array.
+        window_level: A tuple of two elements, representing the center (level) and the width of the window.
+
+    Returns:
+        An image of type uint8, where the values below the window are 0 and the values above it are 255.
+    """
+    level, width = window_level
+    lower_value = level - width / 2
+
+    scaled_image = (image.astype(numpy.float32) - lower_value) * (255 / max(width, 1))
+    return numpy.clip(scaled_image, 0, 255).astype(numpy.uint8)
+
+
+@functools.lru_cache(maxsize=32)
+def window_lookup_table(dtype: numpy.dtype, window_level: Tuple[float, float]) -> numpy.ndarray:
+    """
+    Computes the lookup table that maps each value of an integer type of up to 16 bits to grayscale with a window.
+    The table is indexed by the bits of the values read as unsigned integers, so signed images are looked up through
+    an unsigned view without converting them. The tables of the last windows are kept.
+
+    Args:
+        dtype: The integer data type of the images.
+        window_level: A tuple of two elements, representing the center (level) and the width of the window.
+
+    Returns:
+        The lookup table, represented as a read-only uint8 numpy array with one entry per value of the type.
+    """
+    dtype = numpy.dtype(dtype)
+    unsigned_values = numpy.arange(2 ** (8 * dtype.itemsize), dtype=numpy.dtype('u{0}'.format(dtype.itemsize)))
+
+    lookup_table = apply_window(unsigned_values.view(dtype), window_level)
+    lookup_table.flags.writeable = False
+
+    return lookup_table
+
+
+def window_image(image: numpy.ndarray, window_level: Tuple[float, float] = None) -> numpy.ndarray:
+    """
+    Maps an image to grayscale with a window, as apply_window, with a lookup table for integer images of up to 16
+    bits. The table is indexed through an unsigned view of the image, so signed images are not converted.
+
+    Args:
+        image: A grayscale image, represented as a numpy array.
+        window_level: A tuple of two elements, representing the center (level) and the width of the window
+                      (optional). If None, the range of the image is mapped to [0, 255].
+
+    Returns:
+        An image of type uint8, with the same shape as the original one.
+    """
+    if window_level is None:
+        minimum, maximum = float(image.min()), float(image.max())
+        window_level = ((minimum + maximum) / 2, maximum - minimum)
+
+    if image.dtype.kind in 'iu' and image.dtype.itemsize <= 2:
+        lookup_table = window_lookup_table(image.dtype, tuple(float(value) for value in window_level))
+        unsigned_image = image.view(numpy.dtype('u{0}'.format(image.dtype.itemsize)))
+        return numpy.take(lookup_table, unsigned_image)
+
+    return apply_window(image, window_level)
+
+
+@Instrumentation.timed('Utils.render_image')
+def render_image(image: numpy.ndarray, size: Tuple[int, int], window_level: Tuple[float, float] = None,
+                 background_color: int = 0, pixel_spacing: Tuple[float, float] = None,
+                 output: numpy.ndarray = None) -> numpy.ndarray:
+    """
+    Renders a grayscale image to be shown: maps it to uint8 with a window, resizes it keeping its aspect ratio and
+    pads it with a color, as apply_window followed by resize_image.
+
+    The window is applied with window_image before resizing, so the image is only interpolated as uint8. Then, the
+    image is resized straight into its place in the output, so the padding does not need to copy it again.
+
+    Args:
+        image: A grayscale image, represented as a numpy array.
+        size: A tuple of two elements, representing the new size.
+        window_level: A tuple of two elements, representing the center (level) and the width of the window
+                      (optional). If None, the range of the image is mapped to [0, 255].
+        background_color: An integer, representing the grayscale color of the padding.
+        pixel_spacing: A tuple of two floats, representing the spacing of the rows and of the columns of the image
+                       (optional), as in resize_image.
+        output: A uint8 numpy array with the new size, where the image is rendered (optional). If None, a new array
+                is allocated. Reusing the output of a previous call avoids allocating it for each image.
+
+    Returns:
+        The rendered image, represented as a uint8 numpy array of the new size. It is the output array, if given.
+    """
+    gray_image = window_image(image, window_level)
+
+    (new_height, new_width), (padding_top, padding_bottom, padding_left, padding_right) = \
+        compute_fitted_size(image.shape, size, pixel_spacing)
+
+    if output is None:
+        output = numpy.empty(size, dtype=numpy.uint8)
+
+    output[:padding_top, :] = background_color
+    output[size[0] - padding_bottom:, :] = background_color
+    output[:, :padding_left] = background_color
+    output[:, size[1] - padding_right:] = background_color
+
+    cv2.resize(gray_image, (new_width, new_height),
+               dst=output[padding_top:padding_top + new_height, padding_left:padding_left + new_width],
+               interpolation=choose_interpolation(image.shape, (new_height, new_width)))
+
+    return output
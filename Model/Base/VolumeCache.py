@@ -0,0 +1,190 @@
+import hashlib
+import json
+import numpy
+import os
+import threading
+
+from typing import Dict, List, Optional, Tuple
+
+
+class VolumeCache:
+
+    __default_cache = None
+
+    DEFAULT_DIRECTORY = os.path.join(os.path.expanduser('~'), '.cache', 'MedicalImageTools', 'volumes')
+    DEFAULT_MAX_SIZE = 4 * 1024 ** 3
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY, max_size: int = DEFAULT_MAX_SIZE):
+        """
+        Initializes the on-disk cache of assembled volumes.
+
+        Each entry is stored as a .npy file, that is reopened as a read-only memory map, and a JSON sidecar with its
+        metadata. When the total size of the volumes exceeds the limit, the least recently used entries are removed.
+
+        Args:
+            directory: A string, representing the folder where the volumes are stored.
+            max_size: An integer, representing the maximum size of the stored volumes in bytes.
+        """
+        self.__directory = directory
+        self.__max_size = max_size
+        self.__lock = threading.Lock()
+
+    @classmethod
+    def default(cls) -> 'VolumeCache':
+        """
+        Returns the cache shared by the application, placed in the user cache folder.
+
+        Returns:
+            A VolumeCache object.
+        """
+        if cls.__default_cache is None:
+            cls.__default_cache = VolumeCache()
+        return cls.__default_cache
+
+    @staticmethod
+    def compute_key(folder_path: str, files_paths: List[str], series_uid: Optional[str],
+                    dtype: Optional[numpy.dtype]) -> str:
+        """
+        Computes the key of a volume from the folder, the modification times of its files and the read series.
+        Only the file system metadata is used, so computing the key does not open any file.
+
+        Args:
+            folder_path: A string, representing the path of the folder.
+            files_paths: A list of strings, representing the paths of the files in the folder.
+            series_uid: A string, representing the requested series UID, or None if the default series is read.
+            dtype: The requested data type of the volume, or None if the stored type is kept.
+
+        Returns:
+            A string, representing the key of the volume.
+        """
+        key = hashlib.sha1()
+        key.update(os.path.abspath(folder_path).encode('utf-8'))
+        key.update(str(series_uid).encode('utf-8'))
+        key.update(str(None if dtype is None else numpy.dtype(dtype).str).encode('utf-8'))
+
+        for file_path in files_paths:
+            file_stat = os.stat(file_path)
+            key.update('{0}:{1}:{2};'.format(os.path.basename(file_path), file_stat.st_mtime_ns,
+                                             file_stat.st_size).encode('utf-8'))
+
+        return key.hexdigest()
+
+    def load(self, key: str) -> Optional[Tuple[numpy.ndarray, Dict]]:
+        """
+        Opens a cached volume.
+
+        Args:
+            key: A string, representing the key of the volume.
+
+        Returns:
+            A tuple with the volume, opened as a read-only memory map, and its metadata; or None if the volume is not
+            in the cache.
+        """
+        volume_path, metadata_path = self.__get_paths(key)
+
+        try:
+            with open(metadata_path, 'r') as metadata_file:
+                metadata = json.load(metadata_file)
+            volume = numpy.load(volume_path, mmap_mode='r')
+            os.utime(metadata_path)
+        except (OSError, ValueError):
+            return None
+
+        return volume, metadata
+
+    def store(self, key: str, volume: numpy.ndarray, metadata: Dict):
+        """
+        Stores a volume and its metadata, and evicts the least recently used volumes if the cache is full.
+
+        Args:
+            key: A string, representing the key of the volume.
+            volume: The volume, represented as a numpy array.
+            metadata: A dictionary, representing the metadata of the volume. It must be serializable as JSON.
+        """
+        if volume.nbytes > self.__max_size:
+            return
+
+        os.makedirs(self.__directory, exist_ok=True)
+        volume_path, metadata_path = self.__get_paths(key)
+
+        with self.__lock:
+            temporary_path = volume_path + '.{0}.tmp'.format(os.getpid())
+            with open(temporary_path, 'wb') as volume_file:
+                numpy.save(volume_file, volume)
+            os.replace(temporary_path, volume_path)
+
+            with open(metadata_path + '.tmp', 'w') as metadata_file:
+                json.dump(metadata, metadata_file)
+            os.replace(metadata_path + '.tmp', metadata_path)
+
+            self.__evict()
+
+    def clear(self):
+        """
+        Removes all the volumes of the cache.
+        """
+        with self.__lock:
+            for key, _, _ in self.__list_entries():
+                self.__remove(key)
+
+    def __evict(self):
+        """
+        Removes the least recently used volumes until the size of the cache is below the limit.
+        """
+        entries = sorted(self.__list_entries(), key=lambda entry: entry[2])
+        total_size = sum(size for _, size, _ in entries)
+
+        for key, size, _ in entries:
+            if total_size <= self.__max_size:
+                break
+            self.__remove(key)
+            total_size -= size
+
+    def __list_entries(self) -> List[Tuple[str, int, float]]:
+        """
+        Lists the volumes stored in the cache.
+
+        Returns:
+            A list of tuples with the key, the size in bytes and the last access time of each volume.
+        """
+        if not os.path.isdir(self.__directory):
+            return []
+
+        entries = []
+        for file_name in os.listdir(self.__directory):
+            if not file_name.endswith('.npy'):
+                continue
+
+            key = file_name[:-len('.npy')]
+            volume_path, metadata_path = self.__get_paths(key)
+            try:
+                entries.append((key, os.path.getsize(volume_path), os.path.getmtime(metadata_path)))
+            except OSError:
+                entries.append((key, 0, 0.0))
+
+        return entries
+
+    def __remove(self, key: str):
+        """
+        Removes a volume and its metadata.
+
+        Args:
+            key: A string, representing the key of the volume.
+        """
+        for path in self.__get_paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def __get_paths(self, key: str) -> Tuple[str, str]:
+        """
+        Returns the paths of the files of a volume.
+
+        Args:
+            key: A string, representing the key of the volume.
+
+        Returns:
+            A tuple of two strings: the path of the volume and the path of its metadata.
+        """
+        return os.path.join(self.__directory, key + '.npy'), os.path.join(self.__directory, key + '.json')
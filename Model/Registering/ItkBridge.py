@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import numpy
+
+from Model.Base.LazyModule import LazyModule
+from Model.Base.SelectedFile import SelectedFile
+
+itk = LazyModule('SimpleITK')
+
+
+def set_geometry(image: itk.Image, selected_file: SelectedFile):
+    """
+    Sets the spacing, origin and direction of a SimpleITK image built from the tensor of a file.
+
+    SimpleITK indexes the numpy arrays in reverse order, so the first axis of the image is the last axis of the
+    tensor.
+
+    Args:
+        image: A SimpleITK image, built from the image tensor of the file.
+        selected_file: The read SelectedFile object.
+    """
+    dimension = image.GetDimension()
+    spacing = selected_file.spacing[:dimension]
+    direction = numpy.array(selected_file.direction)[:dimension, :dimension]
+
+    image.SetSpacing([float(value) for value in spacing[::-1]])
+    image.SetOrigin([float(value) for value in selected_file.origin[:dimension]])
+    image.SetDirection([float(value) for value in direction[:, ::-1].flatten()])
+
+
+def image_from_file(selected_file: SelectedFile) -> itk.Image:
+    """
+    Builds a float SimpleITK image from the tensor of a file, keeping its physical geometry.
+
+    The tensor is copied once in its stored type and cast to float inside SimpleITK, so no intermediate float copy
+    of the tensor is allocated in numpy.
+
+    Args:
+        selected_file: The read SelectedFile object.
+
+    Returns:
+        A SimpleITK image of type float32.
+    """
+    image = itk.GetImageFromArray(selected_file.image_tensor)
+    if image.GetPixelID() != itk.sitkFloat32:
+        image = itk.Cast(image, itk.sitkFloat32)
+
+    set_geometry(image, selected_file)
+
+    return image
+
+
+def image_from_series(selected_file: SelectedFile) -> itk.Image:
+    """
+    Reads the files of a series directly with the multi-threaded SimpleITK series reader, in the same order as the
+    tensor of the file. The values of the image are the modality values, since the reader applies the rescale slope
+    and intercept.
+
+    The first axis of the read image is the column, the second one the row and the third one the slice, so its array
+    has shape (slices, rows, columns).
+
+    Args:
+        selected_file: The read SelectedFile object. It must be a folder.
+
+    Returns:
+        A SimpleITK image.
+    """
+    reader = itk.ImageSeriesReader()
+    reader.SetFileNames(selected_file.files_paths)
+    reader.SetOutputPixelType(itk.sitkFloat32)
+
+    return reader.Execute()
+
+
+def to_stored_values(image: itk.Image, selected_file: SelectedFile) -> itk.Image:
+    """
+    Converts an image with modality values, as the ones read with the series reader, into the stored values of a
+    file.
+
+    Args:
+        image: A SimpleITK image of type float32, with modality values.
+        selected_file: The SelectedFile object whose rescale slope and intercept are undone.
+
+    Returns:
+        A SimpleITK image with the stored values of the file.
+    """
+    if not selected_file.has_rescale():
+        return image
+
+    return itk.ShiftScale(image, shift=-selected_file.rescale_intercept, scale=1 / selected_file.rescale_slope)
+
+
+def array_from_image(image: itk.Image, from_series: bool) -> numpy.ndarray:
+    """
+    Returns a copy of the buffer of an image, in the layout of the tensors: (rows, columns, slices).
+
+    A view of the buffer, as returned by GetArrayViewFromImage, does not keep the image alive, so reading it after the
+    image is released crashes the process. The buffer is copied once, and the array owns its memory.
+
+    Args:
+        image: A SimpleITK image.
+        from_series: A boolean, indicating if the grid of the image comes from the series reader, whose array has
+                     shape (slices, rows, columns).
+
+    Returns:
+        A numpy array, independent of the image.
+    """
+    array = itk.GetArrayFromImage(image)
+    if from_series:
+        array = numpy.transpose(array, (1, 2, 0))
+
+    return array
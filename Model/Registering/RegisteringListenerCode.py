@@ -9,5 +9,7 @@ class RegisteringListenerCode(Enum):
     ALPHA_SLIDER_CHANGED = 4
     REGISTERING_WILL_START = 5
     REGISTERING_DID_FINISH = 6
+    REGISTERING_DID_PROGRESS = 7
+    REGISTERING_WILL_CANCEL = 8
 
 
@@ -1,14 +1,21 @@
-import cv2
-import matplotlib.cm as cm
+from __future__ import annotations
+
+import logging
 import numpy
-import SimpleITK as itk
 import threading
 
 from typing import Callable, Tuple
 
-from Controller.Registering.RegisteringListenerCode import RegisteringListenerCode
-from Model.Base import Utils
+from Model.Base import Instrumentation, Utils
+from Model.Base.LazyModule import LazyModule
 from Model.Base.SelectedFile import SelectedFile
+from Model.Registering import ItkBridge
+from Model.Registering.RegisteringListenerCode import RegisteringListenerCode
+
+cv2 = LazyModule('cv2')
+itk = LazyModule('SimpleITK')
+
+logger = logging.getLogger(__name__)
 
 
 class RegisteringModel(threading.Thread):
@@ -22,6 +29,13 @@ class RegisteringModel(threading.Thread):
         self.__second_image_file: SelectedFile = None
         self.__registered_images: numpy.ndarray = None
 
+        # The SimpleITK images are kept while the picked files do not change, so repeated registrations of the same
+        # pair reuse them.
+        self.__itk_images = {}
+
+        self.__registration_thread: threading.Thread = None
+        self.__cancel_event = threading.Event()
+
     def set_picked_files(self, first_image_file: SelectedFile, second_image_file: SelectedFile):
         """
         Sets the picked files.
@@ -33,6 +47,9 @@ class RegisteringModel(threading.Thread):
         self.__first_image_file = first_image_file
         self.__second_image_file = second_image_file
 
+        self.__itk_images = {}
+        self.__registered_images = None
+
         try:
             self.__first_image_file.read()
             self.__second_image_file.read()
@@ -57,6 +74,7 @@ class RegisteringModel(threading.Thread):
 
         return max(limit1, limit2)
 
+    @Instrumentation.timed('RegisteringModel.get_tensor_images')
     def get_tensor_images(self, axis: int, slice: int,
                           alpha: int) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
         """
@@ -68,7 +86,8 @@ class RegisteringModel(threading.Thread):
             alpha: An integer, representing the alpha value.
 
         Returns:
-            A tuple of three images.
+            A tuple with the first image, the second image, their alpha-combination and the registered image (None if
+            the images have not been registered), represented as uint8 numpy arrays.
         """
         image1_limit = self.__first_image_file.image_tensor.shape[axis]
         image2_limit = self.__second_image_file.image_tensor.shape[axis]
@@ -99,26 +118,109 @@ class RegisteringModel(threading.Thread):
             if self.__registered_images is not None:
                 registered = self.__registered_images[:, :, min(slice, image1_limit - 1)]
 
-        image1 = Utils.resize_image(image1, size=(300, 300), background_color=127)
-        image2 = Utils.resize_image(image2, size=(300, 300), background_color=127)
+        # The slices are rendered with the aspect ratio of their physical size. The registered image is resampled
+        # on the grid of the first image, so it has its spacing, and keeps the stored values of the second image, so
+        # it is shown with its window.
+        first_spacing = self.__first_image_file.get_pixel_spacing(axis)
+        second_window = self.__second_image_file.get_display_window()
+
+        image1 = Utils.render_image(image1, size=(300, 300), window_level=self.__first_image_file.get_display_window(),
+                                    background_color=127, pixel_spacing=first_spacing)
+        image2 = Utils.render_image(image2, size=(300, 300), window_level=second_window, background_color=127,
+                                    pixel_spacing=self.__second_image_file.get_pixel_spacing(axis))
 
         if self.__registered_images is not None:
-            registered = Utils.resize_image(registered, size=(300, 300), background_color=127)
+            registered = Utils.render_image(registered, size=(300, 300), window_level=second_window,
+                                            background_color=127, pixel_spacing=first_spacing)
 
-        alpha_image = (1 - alpha / 100) * image1 + (alpha / 100) * image2
+        alpha_image = cv2.addWeighted(image1, 1 - alpha / 100, image2, alpha / 100, 0)
 
         return image1, image2, alpha_image, registered
 
+    def start_registration(self, **kwargs):
+        """
+        Starts the registration of the images in a background thread. The progress and the end of the registration
+        are notified to the listener from that thread.
+
+        Args:
+            **kwargs: The parameters of the registration, as in register_images.
+        """
+        if self.is_registering():
+            return
+
+        self.__cancel_event.clear()
+        self.__registration_thread = threading.Thread(target=self.__run_registration, kwargs=kwargs, daemon=True)
+        self.__registration_thread.start()
+
+    def cancel_registration(self):
+        """
+        Requests the running registration to stop. The registered images are not modified.
+        """
+        self.__cancel_event.set()
+
+    def is_registering(self) -> bool:
+        """
+        Checks if a registration is running.
+
+        Returns:
+            A boolean, indicating if the registration thread is alive.
+        """
+        return self.__registration_thread is not None and self.__registration_thread.is_alive()
+
+    def __run_registration(self, **kwargs):
+        """
+        Runs the registration in the background thread. If it fails, the exception is logged and sent to the
+        listener with the event REGISTERING_DID_FINISH, with status -1 and the message of the error.
+
+        Args:
+            **kwargs: The parameters of the registration, as in register_images.
+        """
+        try:
+            self.register_images(**kwargs)
+        except Exception as exception:
+            logger.exception('Registration error')
+            self.__listener(RegisteringListenerCode.REGISTERING_DID_FINISH, status=-1, error=str(exception))
+
+    @Instrumentation.timed('RegisteringModel.register_images')
     def register_images(self, **kwargs):
         """
         Registers the images.
+
+        The registration can be computed in several resolution levels, from the coarsest to the finest. Each level
+        shrinks the images by its shrink factor after smoothing them with its sigma, in physical units. By default,
+        a single level with the full resolution images is used.
+
+        The images keep the spacing, origin and direction of the DICOM headers, so the optimization is done in
+        physical units. If use_series_reader is set and both images are folders, the images are read directly with
+        the SimpleITK series reader instead of being copied from the tensors.
+
+        On each iteration of the optimizer, the listener receives the event REGISTERING_DID_PROGRESS with the level,
+        the iteration and the metric value. When the registration ends, the listener receives the event
+        REGISTERING_DID_FINISH with status 1 if the images have been registered or 0 if it has been cancelled.
+
+        Args:
+            **kwargs: The parameters of the registration: learning_rate, number_iterations, similarity_function and,
+                      optionally, shrink_factors and smoothing_sigmas (two lists with one value per level) and
+                      use_series_reader.
         """
         learning_rate = kwargs['learning_rate']
         number_iterations = kwargs['number_iterations']
         similarity_function = kwargs['similarity_function']
+        shrink_factors = kwargs.get('shrink_factors') or [1]
+        smoothing_sigmas = kwargs.get('smoothing_sigmas') or [0] * len(shrink_factors)
 
-        img1 = itk.GetImageFromArray(self.__first_image_file.image_tensor.astype(numpy.float32))
-        img2 = itk.GetImageFromArray(self.__second_image_file.image_tensor.astype(numpy.float32))
+        if len(shrink_factors) != len(smoothing_sigmas):
+            raise ValueError("The number of shrink factors and smoothing sigmas must be the same.")
+        if any(shrink_factor <= 0 for shrink_factor in shrink_factors):
+            raise ValueError("The shrink factors must be positive.")
+        if any(smoothing_sigma < 0 for smoothing_sigma in smoothing_sigmas):
+            raise ValueError("The smoothing sigmas cannot be negative.")
+
+        use_series_reader = kwargs.get('use_series_reader', False) and \
+            not self.__first_image_file.is_file() and not self.__second_image_file.is_file()
+
+        img1 = self.__get_itk_image(self.__first_image_file, use_series_reader)
+        img2 = self.__get_itk_image(self.__second_image_file, use_series_reader)
 
         registration_method = itk.ImageRegistrationMethod()
 
@@ -131,6 +233,8 @@ class RegisteringModel(threading.Thread):
         registration_method.SetMetricSamplingPercentage(0.01)
 
         registration_method.SetInterpolator(itk.sitkLinear)
+        registration_method.SetShrinkFactorsPerLevel(shrinkFactors=shrink_factors)
+        registration_method.SetSmoothingSigmasPerLevel(smoothingSigmas=smoothing_sigmas)
         registration_method.SmoothingSigmasAreSpecifiedInPhysicalUnitsOn()
 
         registration_method.SetOptimizerAsGradientDescent(learningRate=learning_rate,
@@ -143,12 +247,24 @@ class RegisteringModel(threading.Thread):
                                                              itk.CenteredTransformInitializerFilter.GEOMETRY)
 
         registration_method.SetInitialTransform(initial_transform, inPlace=False)
+        registration_method.AddCommand(itk.sitkIterationEvent,
+                                       lambda: self.__registration_did_iterate(registration_method))
+
         final_transform = registration_method.Execute(img1, img2)
 
+        if self.__cancel_event.is_set():
+            self.__listener(RegisteringListenerCode.REGISTERING_DID_FINISH, status=0)
+            return
+
         resampler = itk.ResampleImageFilter()
-        resampler.SetReferenceImage(img2)
+        resampler.SetReferenceImage(img1)
         resampler.SetInterpolator(itk.sitkLinear)
-        resampler.SetDefaultPixelValue(100)
+        default_pixel_value = 100
+        if use_series_reader:
+            # The series reader works with modality values, that are converted back to stored values after resampling.
+            default_pixel_value = 100 * self.__second_image_file.rescale_slope + \
+                self.__second_image_file.rescale_intercept
+        resampler.SetDefaultPixelValue(default_pixel_value)
         resampler.SetTransform(final_transform)
 
         out = resampler.Execute(img2)
@@ -156,9 +272,54 @@ class RegisteringModel(threading.Thread):
         print('Final metric value: {0}'.format(registration_method.GetMetricValue()))
         print('Optimizer\'s stopping condition, {0}'.format(registration_method.GetOptimizerStopConditionDescription()))
 
-        self.__registered_images = itk.GetArrayFromImage(out)
-        self.__listener(RegisteringListenerCode.REGISTERING_DID_FINISH)
+        if use_series_reader:
+            out = ItkBridge.to_stored_values(out, self.__second_image_file)
+
+        # The registered images own their buffer, so the slices being rendered from the previous result stay valid
+        # when it is replaced.
+        self.__registered_images = ItkBridge.array_from_image(out, from_series=use_series_reader)
+        self.__listener(RegisteringListenerCode.REGISTERING_DID_FINISH, status=1)
 
+    def __get_itk_image(self, selected_file: SelectedFile, use_series_reader: bool) -> itk.Image:
+        """
+        Returns the SimpleITK image of a picked file, building it only the first time it is requested.
+
+        Args:
+            selected_file: One of the picked files.
+            use_series_reader: A boolean, indicating if the image is read with the SimpleITK series reader.
+
+        Returns:
+            A SimpleITK image of type float32.
+        """
+        key = (id(selected_file), use_series_reader)
+        if key not in self.__itk_images:
+            # Only the images of the last reading mode are kept.
+            self.__itk_images = {cached_key: image for cached_key, image in self.__itk_images.items()
+                                 if cached_key[1] == use_series_reader}
+
+            if use_series_reader:
+                self.__itk_images[key] = ItkBridge.image_from_series(selected_file)
+            else:
+                self.__itk_images[key] = ItkBridge.image_from_file(selected_file)
+
+        return self.__itk_images[key]
+
+    def __registration_did_iterate(self, registration_method: itk.ImageRegistrationMethod):
+        """
+        Observer of the iterations of the optimizer. Notifies the progress and stops the optimizer if the
+        registration has been cancelled.
+
+        Args:
+            registration_method: The running ImageRegistrationMethod object.
+        """
+        if self.__cancel_event.is_set():
+            registration_method.StopRegistration()
+            return
+
+        self.__listener(RegisteringListenerCode.REGISTERING_DID_PROGRESS,
+                        level=registration_method.GetCurrentLevel(),
+                        iteration=registration_method.GetOptimizerIteration(),
+                        metric_value=registration_method.GetMetricValue())
 
     def get_first_file(self):
         return self.__first_image_file
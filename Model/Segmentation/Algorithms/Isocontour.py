@@ -1,47 +1,42 @@
 import numpy
 
 from typing import Tuple
-from PIL import Image
 
+from Model.Segmentation.Algorithms.Overlay import DEFAULT_OVERLAY_COLOR, overlay_mask
 
-def isocontour_segment_image(image: numpy.ndarray, upper_threshold: int,
-                             lower_threshold) -> Tuple[numpy.ndarray, numpy.ndarray]:
+
+def isocontour_segment_image(image: numpy.ndarray, upper_threshold: int, lower_threshold,
+                             display_image: numpy.ndarray = None) -> Tuple[numpy.ndarray, numpy.ndarray]:
     """
     Detects the isocontour.
 
     Args:
         image: The original image, represented as a numpy array.
         threshold: An integer, representing the threshold for the image.
+        display_image: The original image as it is shown, represented as a uint8 numpy array with the same shape
+                       (optional). The thresholds are applied to the original image, and the marked pixels are
+                       painted over this one. If None, they are painted over the original image.
 
     Returns:
         A tuple of two images.
     """
     mask = (image >= lower_threshold) & (image <= upper_threshold)
 
-    return mask, compute_printed_mask(image, mask)
+    return mask, compute_printed_mask(image if display_image is None else display_image, mask)
 
 
-def compute_printed_mask(image: numpy.ndarray, mask: numpy.ndarray) -> numpy.ndarray:
+def compute_printed_mask(image: numpy.ndarray, mask: numpy.ndarray,
+                         color: Tuple[int, int, int] = DEFAULT_OVERLAY_COLOR, alpha: float = 1.0) -> numpy.ndarray:
     """
     Writes each pixel marked in the mask into the original image.
 
     Args:
         image: The original image, represented as a numpy array.
         mask: The mask that contains the marked pixels, represented as a numpy array.
+        color: A tuple of three integers, representing the RGB color of the marked pixels.
+        alpha: A float in [0, 1], representing the opacity of the color over the original image.
 
     Returns:
         An image, representing the modified original image.
     """
-    original_image = Image.fromarray(image)
-
-    color_image = Image.new("RGB", original_image.size)
-    color_image.paste(original_image)
-
-    temp_mask = numpy.transpose(mask)
-
-    for i in range(mask.shape[0]):
-        for j in range(mask.shape[1]):
-            if temp_mask[i, j]:
-                color_image.putpixel((i, j), (20, 40, 80))
-
-    return numpy.array(color_image)
+    return overlay_mask(image, mask, color=color, alpha=alpha)
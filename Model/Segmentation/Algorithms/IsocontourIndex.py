@@ -0,0 +1,100 @@
+import numpy
+
+from typing import Tuple
+
+from Model.Segmentation.Algorithms.Overlay import DEFAULT_OVERLAY_COLOR, to_rgb_image
+
+
+class IsocontourIndex:
+
+    def __init__(self, image: numpy.ndarray, voxel_volume: float = 1.0,
+                 color: Tuple[int, int, int] = DEFAULT_OVERLAY_COLOR, display_image: numpy.ndarray = None):
+        """
+        Initializes the index of an image that allows to update the isocontour segmentation incrementally.
+
+        The pixels are sorted by intensity once, so the pixels between two thresholds are a contiguous range of the
+        sorted order. When the thresholds move, only the pixels between the old and the new position of each threshold
+        change, and only those pixels are updated in the mask and in the marked image.
+
+        Args:
+            image: The original image, represented as a numpy array.
+            voxel_volume: A float, representing the volume of each pixel in cubic millimetres.
+            color: A tuple of three integers, representing the RGB color of the marked pixels.
+            display_image: The original image as it is shown, represented as a uint8 numpy array with the same shape
+                           (optional), as in isocontour_segment_image.
+        """
+        self.__shape = image.shape
+        self.__voxel_volume = voxel_volume
+        self.__color = numpy.array(color, dtype=numpy.uint8)
+
+        values = numpy.ravel(image)
+        self.__order = numpy.argsort(values, kind='stable')
+        self.__sorted_values = values[self.__order]
+
+        self.__original_image = to_rgb_image(image if display_image is None else display_image).reshape(-1, 3)
+        self.__marked_image = self.__original_image.copy()
+        self.__mask = numpy.zeros(values.shape, dtype=bool)
+
+        self.__first_position = 0
+        self.__last_position = 0
+
+    def update(self, upper_threshold: int, lower_threshold: int) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Updates the segmentation with new thresholds.
+
+        Args:
+            upper_threshold: An integer, representing the upper threshold.
+            lower_threshold: An integer, representing the lower threshold.
+
+        Returns:
+            A tuple with the mask and the marked image, as in isocontour_segment_image. Both arrays are owned by the
+            index and are modified by the next update.
+        """
+        first_position = int(numpy.searchsorted(self.__sorted_values, lower_threshold, side='left'))
+        last_position = max(int(numpy.searchsorted(self.__sorted_values, upper_threshold, side='right')),
+                            first_position)
+
+        # The pixels that enter or leave the range are the ones between the old and new position of each end.
+        self.__toggle(min(first_position, self.__first_position), max(first_position, self.__first_position))
+        self.__toggle(min(last_position, self.__last_position), max(last_position, self.__last_position))
+
+        self.__first_position = first_position
+        self.__last_position = last_position
+
+        return self.__mask.reshape(self.__shape), self.__marked_image.reshape(self.__shape[:2] + (3,))
+
+    def get_voxel_count(self) -> int:
+        """
+        Returns the number of marked pixels.
+
+        Returns:
+            An integer, representing the number of pixels between the current thresholds.
+        """
+        return self.__last_position - self.__first_position
+
+    def get_volume(self) -> float:
+        """
+        Returns the volume of the marked pixels.
+
+        Returns:
+            A float, representing the volume in cubic millimetres.
+        """
+        return self.get_voxel_count() * self.__voxel_volume
+
+    def __toggle(self, first_position: int, last_position: int):
+        """
+        Toggles the pixels in a range of the sorted order, in the mask and in the marked image.
+
+        Args:
+            first_position: An integer, representing the first position of the range.
+            last_position: An integer, representing the position after the last one of the range.
+        """
+        if first_position >= last_position:
+            return
+
+        pixels = self.__order[first_position:last_position]
+        self.__mask[pixels] ^= True
+
+        marked_pixels = self.__mask[pixels]
+        self.__marked_image[pixels] = numpy.where(marked_pixels[:, numpy.newaxis], self.__color,
+                                                  self.__original_image[pixels])
@@ -0,0 +1,57 @@
+import numpy
+
+from typing import Tuple
+
+DEFAULT_OVERLAY_COLOR = (20, 40, 80)
+
+
+def to_rgb_image(image: numpy.ndarray) -> numpy.ndarray:
+    """
+    Converts an image into an 8-bit RGB image, following the same conversion that PIL applies when a grayscale
+    image is pasted into an RGB canvas (values are clipped to [0, 255] and truncated).
+
+    Args:
+        image: The original image, represented as a numpy array.
+
+    Returns:
+        An RGB image of type uint8, represented as a numpy array of shape (height, width, 3).
+    """
+    if image.dtype == numpy.bool_:
+        gray_image = image.astype(numpy.uint8) * 255
+    elif image.dtype == numpy.uint8:
+        gray_image = image
+    else:
+        gray_image = numpy.clip(image, 0, 255).astype(numpy.uint8)
+
+    if gray_image.ndim == 3:
+        return numpy.array(gray_image[:, :, :3], dtype=numpy.uint8, copy=True)
+
+    return numpy.repeat(gray_image[:, :, numpy.newaxis], 3, axis=2)
+
+
+def overlay_mask(image: numpy.ndarray, mask: numpy.ndarray, color: Tuple[int, int, int] = DEFAULT_OVERLAY_COLOR,
+                 alpha: float = 1.0) -> numpy.ndarray:
+    """
+    Paints the pixels marked in the mask over the image with a certain color.
+
+    Args:
+        image: The original image, represented as a numpy array.
+        mask: A boolean mask with the same height and width as the image, represented as a numpy array.
+        color: A tuple of three integers, representing the RGB color of the overlay.
+        alpha: A float in [0, 1], representing the opacity of the overlay. With 1 the marked pixels are replaced
+               by the color.
+
+    Returns:
+        An RGB image of type uint8, represented as a numpy array.
+    """
+    color_image = to_rgb_image(image)
+    mask = numpy.asarray(mask, dtype=bool)
+
+    if alpha >= 1:
+        color_image[mask] = color
+    elif alpha > 0:
+        overlay_color = numpy.asarray(color, dtype=numpy.float32)
+        blended = (1 - alpha) * color_image[mask] + alpha * overlay_color
+        color_image[mask] = numpy.rint(blended).astype(numpy.uint8)
+
+    return color_image
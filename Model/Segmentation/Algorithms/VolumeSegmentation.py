@@ -0,0 +1,96 @@
+import numpy
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple
+
+from Model.Base import DicomSeriesLoader
+from Model.Segmentation.Algorithms.WatershedSegmenter import WatershedSegmenter
+
+DEFAULT_CHUNK_SLICES = 32
+
+
+def isocontour_segment_volume(tensor: numpy.ndarray, upper_threshold: int, lower_threshold: int,
+                              chunk_slices: int = DEFAULT_CHUNK_SLICES) -> numpy.ndarray:
+    """
+    Detects the isocontour in the whole volume.
+
+    The thresholds are applied to chunks of slices, so the temporary boolean arrays never exceed the size of a
+    chunk.
+
+    Args:
+        tensor: The volume, represented as a numpy array of shape (rows, columns, slices).
+        upper_threshold: An integer, representing the upper threshold.
+        lower_threshold: An integer, representing the lower threshold.
+        chunk_slices: An integer, representing the number of slices thresholded at once.
+
+    Returns:
+        The mask of the volume, represented as a uint8 numpy array with 1 in the marked voxels.
+    """
+    mask = numpy.empty(tensor.shape, dtype=numpy.uint8)
+
+    for first_slice in range(0, tensor.shape[2], chunk_slices):
+        chunk = tensor[:, :, first_slice:first_slice + chunk_slices]
+        chunk_mask = mask[:, :, first_slice:first_slice + chunk_slices]
+
+        numpy.greater_equal(chunk, lower_threshold, out=chunk_mask, casting='unsafe')
+        chunk_mask &= chunk <= upper_threshold
+
+    return mask
+
+
+def watershed_segment_volume(tensor: numpy.ndarray, threshold: int, workers: int = None) -> numpy.ndarray:
+    """
+    Segments each slice of the volume using the watershed method. The slices are segmented in parallel, and each
+    worker reuses the working images of its own WatershedSegmenter.
+
+    Args:
+        tensor: The volume, represented as a numpy array of shape (rows, columns, slices).
+        threshold: An integer, representing the threshold for each normalized slice.
+        workers: An integer, representing the number of workers. If None, one worker per core is used.
+
+    Returns:
+        The mask of the volume, represented as a uint8 numpy array with 1 in the voxels of the segmented regions.
+    """
+    mask = numpy.zeros(tensor.shape, dtype=numpy.uint8)
+    workers_state = threading.local()
+
+    def segment_slice(slice_index: int):
+        if not hasattr(workers_state, 'segmenter'):
+            workers_state.segmenter = WatershedSegmenter()
+
+        _, markers = workers_state.segmenter.segment(numpy.ascontiguousarray(tensor[:, :, slice_index]), threshold)
+        mask[:, :, slice_index] = markers > 1
+
+    with ThreadPoolExecutor(max_workers=workers or DicomSeriesLoader.default_workers()) as executor:
+        for _ in executor.map(segment_slice, range(tensor.shape[2])):
+            pass
+
+    return mask
+
+
+def pack_mask(mask: numpy.ndarray) -> Tuple[numpy.ndarray, Tuple[int, ...]]:
+    """
+    Packs a mask into bits, so each voxel uses one bit.
+
+    Args:
+        mask: A mask, represented as a numpy array.
+
+    Returns:
+        A tuple with the packed mask, represented as a uint8 numpy array, and the shape of the original mask.
+    """
+    return numpy.packbits(mask.astype(bool, copy=False), axis=None), mask.shape
+
+
+def unpack_mask(packed_mask: numpy.ndarray, shape: Tuple[int, ...]) -> numpy.ndarray:
+    """
+    Unpacks a mask packed with pack_mask.
+
+    Args:
+        packed_mask: The packed mask, represented as a uint8 numpy array.
+        shape: A tuple, representing the shape of the original mask.
+
+    Returns:
+        The mask, represented as a uint8 numpy array with 1 in the marked voxels.
+    """
+    return numpy.unpackbits(packed_mask, count=int(numpy.prod(shape))).reshape(shape)
@@ -1,8 +1,9 @@
-import cv2
 import numpy
 
 from typing import Tuple
 
+from Model.Segmentation.Algorithms.WatershedSegmenter import WatershedSegmenter
+
 
 def watershed_segment_image(image: numpy.ndarray, threshold: int) -> Tuple[numpy.ndarray, numpy.ndarray]:
     """
@@ -16,32 +17,28 @@ def watershed_segment_image(image: numpy.ndarray, threshold: int) -> Tuple[numpy
         threshold: An integer, representing the threshold for the image.
 
     Returns:
-        A tuple of two images.
+        A tuple with the image in RGB with the boundaries of the regions in red, and the markers, represented as an
+        int32 numpy array. The markers label the background with 1, the boundaries with -1 and each region with a
+        label greater than 1; compact_labels converts them into consecutive labels.
     """
-    norm_image = cv2.normalize(image, None, alpha=0, beta=255, norm_type=cv2.NORM_MINMAX, dtype=cv2.CV_32F)
-    norm_image = norm_image.astype(numpy.uint8)
-
-    color_image = cv2.cvtColor(norm_image, cv2.COLOR_GRAY2RGB)
-
-    _, thresh = cv2.threshold(norm_image, threshold, 255, cv2.THRESH_BINARY)
+    color_image, markers = compute_watershed_markers(image, threshold)
 
-    kernel = numpy.ones((3, 3), numpy.uint8)
-    opening = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel, iterations=2)
-
-    sure_bg = cv2.dilate(opening, kernel, iterations=3)
-
-    dist_transform = cv2.distanceTransform(opening, cv2.DIST_L2, 5)
-    ret, sure_fg = cv2.threshold(dist_transform, 0.7 * dist_transform.max(), 255, 0)
+    color_image[markers == -1] = [255, 0, 0]
 
-    sure_fg = numpy.uint8(sure_fg)
-    unknown = cv2.subtract(sure_bg, sure_fg)
+    return color_image, markers
 
-    ret, markers = cv2.connectedComponents(sure_fg)
-    markers = markers + 1
-    markers[unknown == 255] = 0
 
-    markers = cv2.watershed(color_image, markers)
+def compute_watershed_markers(image: numpy.ndarray, threshold: int) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Computes the markers of the watershed method. The background is labelled with 1, the boundaries between regions
+    with -1 and each segmented region with a label greater than 1. To segment several images, a WatershedSegmenter
+    reuses its working images between them.
 
-    color_image[markers == -1] = [255, 0, 0]
+    Args:
+        image: An image, represented as a numpy array.
+        threshold: An integer, representing the threshold for the normalized image.
 
-    return color_image, None
+    Returns:
+        A tuple with the normalized image in RGB and the markers, represented as an int32 numpy array.
+    """
+    return WatershedSegmenter().segment(image, threshold)
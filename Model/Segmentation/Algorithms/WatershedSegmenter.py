@@ -0,0 +1,167 @@
+import numpy
+
+from typing import Tuple
+
+from Model.Base.LazyModule import LazyModule
+
+cv2 = LazyModule('cv2')
+
+
+class WatershedSegmenter:
+
+    DEFAULT_FOREGROUND_RATIO = 0.7
+
+    def __init__(self):
+        """
+        Initializes a reusable segmenter that applies the watershed method of the openCV documentation:
+            https://docs.opencv.org/master/d3/db4/tutorial_py_watershed.html
+
+        The working images of each stage are allocated once for a shape and reused by the next images of the same
+        shape. The pipeline is split in three stages, and each one is only recomputed when its input changes:
+            - set_image: normalizes the image to uint8 and converts it to RGB.
+            - set_threshold: thresholds the normalized image and computes the sure background and the distance
+              transform.
+            - compute_markers: computes the sure foreground, the markers and applies the watershed.
+
+        All the returned images are owned by the segmenter and are overwritten by the next calls, so they must be
+        copied to be kept.
+        """
+        self.__shape: Tuple[int, int] = None
+        self.__kernel = numpy.ones((3, 3), numpy.uint8)
+
+        self.__threshold: int = None
+        self.__foreground_ratio: float = None
+
+    def segment(self, image: numpy.ndarray, threshold: int,
+                foreground_ratio: float = DEFAULT_FOREGROUND_RATIO) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Runs the three stages of the pipeline on an image.
+
+        Args:
+            image: An image, represented as a numpy array.
+            threshold: An integer, representing the threshold for the normalized image.
+            foreground_ratio: A float, representing the fraction of the maximum distance to the background above
+                              which the pixels are sure foreground.
+
+        Returns:
+            A tuple with the normalized image in RGB and the markers, as returned by compute_markers.
+        """
+        self.set_image(image)
+        self.set_threshold(threshold)
+        return self.compute_markers(foreground_ratio)
+
+    def set_image(self, image: numpy.ndarray):
+        """
+        Normalizes a new image. The working images are reallocated only if its shape differs from the previous one.
+
+        Args:
+            image: An image, represented as a numpy array.
+        """
+        if image.shape[:2] != self.__shape:
+            self.__allocate(image.shape[:2])
+
+        cv2.normalize(image, self.__float_image, alpha=0, beta=255, norm_type=cv2.NORM_MINMAX, dtype=cv2.CV_32F)
+        numpy.copyto(self.__norm_image, self.__float_image, casting='unsafe')
+        cv2.cvtColor(self.__norm_image, cv2.COLOR_GRAY2RGB, dst=self.__color_image)
+
+        self.__threshold = None
+        self.__foreground_ratio = None
+
+    def set_threshold(self, threshold: int):
+        """
+        Computes the sure background and the distance transform of the normalized image for a threshold. Nothing is
+        computed if the threshold has not changed since the last call for the current image.
+
+        Args:
+            threshold: An integer, representing the threshold for the normalized image.
+        """
+        if threshold == self.__threshold:
+            return
+
+        cv2.threshold(self.__norm_image, threshold, 255, cv2.THRESH_BINARY, dst=self.__threshold_image)
+        cv2.morphologyEx(self.__threshold_image, cv2.MORPH_OPEN, self.__kernel, dst=self.__opening, iterations=2)
+        cv2.dilate(self.__opening, self.__kernel, dst=self.__sure_background, iterations=3)
+        cv2.distanceTransform(self.__opening, cv2.DIST_L2, 5, dst=self.__distance)
+
+        self.__threshold = threshold
+        self.__foreground_ratio = None
+
+    def compute_markers(self,
+                        foreground_ratio: float = DEFAULT_FOREGROUND_RATIO) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Computes the markers of the watershed method from the sure background and the distance transform. The
+        background is labelled with 1, the boundaries between regions with -1 and each segmented region with a label
+        greater than 1. The markers are not computed again if the ratio has not changed since the last call.
+
+        Args:
+            foreground_ratio: A float, representing the fraction of the maximum distance to the background above
+                              which the pixels are sure foreground.
+
+        Returns:
+            A tuple with the normalized image in RGB and the markers, represented as an int32 numpy array.
+        """
+        if foreground_ratio == self.__foreground_ratio:
+            return self.__color_image, self.__markers
+
+        cv2.threshold(self.__distance, foreground_ratio * self.__distance.max(), 255, cv2.THRESH_BINARY,
+                      dst=self.__float_image)
+        numpy.copyto(self.__sure_foreground, self.__float_image, casting='unsafe')
+        cv2.subtract(self.__sure_background, self.__sure_foreground, dst=self.__unknown)
+
+        cv2.connectedComponents(self.__sure_foreground, labels=self.__markers)
+        self.__markers += 1
+        self.__markers[self.__unknown == 255] = 0
+
+        cv2.watershed(self.__color_image, self.__markers)
+
+        self.__foreground_ratio = foreground_ratio
+        return self.__color_image, self.__markers
+
+    def get_sure_background(self) -> numpy.ndarray:
+        """
+        Returns the sure background of the last threshold.
+
+        Returns:
+            The dilated opening of the thresholded image, represented as a uint8 numpy array.
+        """
+        return self.__sure_background
+
+    def get_sure_foreground(self) -> numpy.ndarray:
+        """
+        Returns the sure foreground of the last markers.
+
+        Returns:
+            The pixels far enough from the background, represented as a uint8 numpy array with 255 in them.
+        """
+        return self.__sure_foreground
+
+    def get_markers(self) -> numpy.ndarray:
+        """
+        Returns the last markers.
+
+        Returns:
+            The markers, represented as an int32 numpy array.
+        """
+        return self.__markers
+
+    def __allocate(self, shape: Tuple[int, int]):
+        """
+        Allocates the working images for a shape.
+
+        Args:
+            shape: A tuple of two integers, representing the rows and columns of the images.
+        """
+        self.__shape = shape
+
+        self.__float_image = numpy.empty(shape, dtype=numpy.float32)
+        self.__norm_image = numpy.empty(shape, dtype=numpy.uint8)
+        self.__color_image = numpy.empty(shape + (3,), dtype=numpy.uint8)
+
+        self.__threshold_image = numpy.empty(shape, dtype=numpy.uint8)
+        self.__opening = numpy.empty(shape, dtype=numpy.uint8)
+        self.__sure_background = numpy.empty(shape, dtype=numpy.uint8)
+        self.__distance = numpy.empty(shape, dtype=numpy.float32)
+
+        self.__sure_foreground = numpy.empty(shape, dtype=numpy.uint8)
+        self.__unknown = numpy.empty(shape, dtype=numpy.uint8)
+        self.__markers = numpy.empty(shape, dtype=numpy.int32)
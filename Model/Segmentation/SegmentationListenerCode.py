@@ -6,5 +6,5 @@ class SegmentationListenerCode(Enum):
     DID_LOAD_IMAGE = 1
     VISUALIZATION_PARAMETERS_DID_CHANGE = 2
     AXIS_DID_CHANGE = 3
-
-
+    DID_LOAD_VOLUME = 4
+    DID_FAIL_LOADING_VOLUME = 5
@@ -1,46 +1,138 @@
 import numpy
-import pydicom
 import threading
 
-from Controller.Segmentation.SegmentationListenerCode import SegmentationListenerCode
-from typing import Callable, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 
-from Model.Base import Utils
+from Model.Base import AxisLayouts, Instrumentation, Utils
 from Model.Base.SelectedFile import SelectedFile
+from Model.Base.SliceCache import SliceCache
 from Model.Segmentation.Algorithms.Configuration.SegmentationAlgorithm import SegmentationAlgorithm
 from Model.Segmentation.Algorithms.Configuration.SegmentationConfiguration import SegmentationConfiguration
 from Model.Segmentation.Algorithms.Isocontour import isocontour_segment_image
+from Model.Segmentation.Algorithms.IsocontourIndex import IsocontourIndex
+from Model.Segmentation.Algorithms.Labels import compact_labels, compute_label_statistics
+from Model.Segmentation.Algorithms.VolumeSegmentation import isocontour_segment_volume, pack_mask, \
+    watershed_segment_volume
 from Model.Segmentation.Algorithms.Watershed import watershed_segment_image
+from Model.Segmentation.Algorithms.WatershedSegmenter import WatershedSegmenter
+from Model.Segmentation.SegmentationListenerCode import SegmentationListenerCode
 
 
 class SegmentationModel(threading.Thread):
 
-    def __init__(self, listener: Callable):
+    def __init__(self, listener: Callable, slice_cache_size: int = SliceCache.DEFAULT_MAX_SIZE,
+                 prefetched_slices: int = 4, axis_layouts_size: int = None):
+        """
+        Initializes the model of the segmentation tool.
+
+        Args:
+            listener: The callable method that acts as listener of the model.
+            slice_cache_size: An integer, representing the memory budget in bytes of the rendered slices cache.
+            prefetched_slices: An integer, representing the number of slices rendered in background in the direction
+                               of scrolling.
+            axis_layouts_size: An integer, representing the memory limit in bytes of the contiguous copies of the
+                               tensor built to read the slices of each axis. With 0, the slices are read from the
+                               tensor. If None, the limit set in the environment is used, which is 0 by default.
+        """
         threading.Thread.__init__(self)
 
         self.__listener = listener
 
         self.__selected_file: SelectedFile = None
 
+        self.__slice_cache = SliceCache(slice_cache_size)
+        self.__segmentation_cache = SliceCache(slice_cache_size)
+        self.__prefetched_slices = prefetched_slices
+        self.__prefetch_executor = ThreadPoolExecutor(max_workers=1)
+        self.__prefetch_request = 0
+
+        # The renders of the slices may run in background while another file is loaded, so the cached images, the
+        # isocontour index and the watershed slice are identified by the load they belong to.
+        self.__load_generation = 0
+
+        self.__last_shown_slice: Tuple[int, int] = None
+        if axis_layouts_size is None:
+            axis_layouts_size = AxisLayouts.configured_max_size()
+        self.__axis_layouts = AxisLayouts.AxisLayouts(axis_layouts_size)
+
+        self.__isocontour_index: IsocontourIndex = None
+        self.__isocontour_index_slice: Tuple[int, int, int, Tuple[float, float]] = None
+        self.__last_isocontour_slice: Tuple[int, int, int, Tuple[float, float]] = None
+        self.__segmented_voxels: int = None
+
+        self.__watershed_segmenter = WatershedSegmenter()
+        self.__watershed_slice: Tuple[int, int, int] = None
+        self.__watershed_markers: Tuple[int, int, numpy.ndarray] = None
+
     def load_dicom_image(self, file: SelectedFile):
         """
-        Loads a DICOM image from the selected path.
+        Loads a DICOM image from the selected file.
+
+        If the file is read lazily, the first slice is sent before the rest of the tensor is read, without the range
+        of the tensor. Once the whole tensor has been read in background, the range is sent with the code
+        DID_LOAD_VOLUME from that thread, or the error with the code DID_FAIL_LOADING_VOLUME if it cannot be read.
+        If the contiguous copies of the tensor are enabled, they are built in background once it has been completely
+        read.
 
         Args:
-            path: A string, representing the path of the selected file.
+            file: The SelectedFile object to load. It is read by this method.
         """
         self.__selected_file = file
-        self.__selected_file.read()
+        self.__selected_file.read(on_volume_read=lambda error: self.__volume_did_load(file, error))
+
+        self.__prefetch_request += 1
+        self.__slice_cache.clear()
+        self.__segmentation_cache.clear()
+        self.__last_shown_slice = None
+
+        self.__isocontour_index = None
+        self.__isocontour_index_slice = None
+        self.__last_isocontour_slice = None
+        self.__segmented_voxels = None
+        self.__watershed_slice = None
+        self.__watershed_markers = None
+
+        # The tensor may be replaced by the background read at any moment, so it is set before checking if it has
+        # been read.
+        self.__axis_layouts.set_tensor(self.__selected_file.image_tensor)
+
+        # The generation changes once the file and its tensor are set, so a render that reads the new generation also
+        # reads the new slices, and the images rendered from the previous file are never found in the caches.
+        self.__load_generation += 1
+
+        tensor_range = None
+        if self.__selected_file.is_volume_read():
+            tensor_range = (self.__selected_file.statistics.minimum, self.__selected_file.statistics.maximum)
+            self.__axis_layouts.build(self.__selected_file.image_tensor)
 
         self.__listener(SegmentationListenerCode.DID_LOAD_IMAGE,
-                        image=Utils.resize_image(image=self.__selected_file.image_tensor[:, :, 0],
-                                                 size=(400, 400),
-                                                 background_color=127),
+                        image=self.get_slice_image(axis=2, slice_index=0),
                         z_axis_limit=self.get_range(2),
-                        tensor_range=(numpy.amin(self.__selected_file.image_tensor),
-                                      numpy.amax(self.__selected_file.image_tensor))
+                        tensor_range=tensor_range
                         )
 
+    def __volume_did_load(self, file: SelectedFile, error: Optional[Exception]):
+        """
+        Sends the range of a tensor read in background and builds its contiguous copies, or sends the error that
+        stopped the read, unless another file has been loaded meanwhile.
+
+        Args:
+            file: The SelectedFile object whose tensor has been read.
+            error: The error that stopped the background read, or None if the tensor has been read.
+        """
+        if file is not self.__selected_file:
+            return
+
+        if error is not None:
+            self.__listener(SegmentationListenerCode.DID_FAIL_LOADING_VOLUME, error=str(error))
+            return
+
+        self.__axis_layouts.build(file.image_tensor)
+        self.__listener(SegmentationListenerCode.DID_LOAD_VOLUME,
+                        tensor_range=(file.statistics.minimum, file.statistics.maximum))
+
+    @Instrumentation.timed('SegmentationModel.segment_image')
     def segment_image(self, image, configuration: SegmentationConfiguration):
         if configuration.get_algorithm() == SegmentationAlgorithm.ISOCONTOUR:
             upper_threshold = configuration.get_configuration()['upper_threshold']
@@ -51,6 +143,211 @@ class SegmentationModel(threading.Thread):
             threshold = configuration.get_configuration()['threshold']
             return watershed_segment_image(image, threshold)
 
+    @Instrumentation.timed('SegmentationModel.segment_slice')
+    def segment_slice(self, axis: int, slice_index: int,
+                      configuration: SegmentationConfiguration) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Segments a slice of the tensor at its original resolution, and resizes the result to be shown.
+
+        The thresholds are applied to the values of the tensor instead of the interpolated and padded values of the
+        shown image, and the isocontour is marked over the slice mapped with the same window as get_slice_image. The
+        segmentation of each slice, configuration and window is cached, so it is only computed once.
+
+        When the isocontour thresholds of the same slice change more than once, an IsocontourIndex of the slice is
+        built, so the next changes only update the pixels that enter or leave the thresholds. The number of marked
+        voxels is available with get_segmentation_statistics. Likewise, the watershed segmenter keeps the normalized
+        slice, so changing the watershed threshold of the same slice does not normalize it again.
+
+        Args:
+            axis: An integer, representing the axis.
+            slice_index: An integer, representing the index of the image in the axis.
+            configuration: A SegmentationConfiguration object, with the algorithm and its parameters.
+
+        Returns:
+            A tuple of two images to be shown, as returned by segment_image. The boolean masks and the watershed
+            markers are returned as uint8 images with 255 in the marked pixels.
+        """
+        generation = self.__load_generation
+        window_level = self.__selected_file.get_display_window()
+        key = (generation, axis, slice_index, configuration.get_algorithm(),
+               tuple(sorted(configuration.get_configuration().items())), window_level)
+
+        segmented_images = (self.__segmentation_cache.get(key + ('mask',)),
+                            self.__segmentation_cache.get(key + ('marked',)))
+
+        is_from_index = False
+        if segmented_images[0] is None:
+            if configuration.get_algorithm() == SegmentationAlgorithm.ISOCONTOUR:
+                segmented_images, is_from_index = self.__segment_isocontour_slice(generation, axis, slice_index,
+                                                                                  configuration, window_level)
+            else:
+                segmented_images = self.__segment_watershed_slice(generation, axis, slice_index, configuration)
+
+            # The images of the index are modified by its next update, so they cannot be cached.
+            if not is_from_index:
+                for name, segmented_image in zip(('mask', 'marked'), segmented_images):
+                    if segmented_image is not None:
+                        self.__segmentation_cache.put(key + (name,), segmented_image)
+
+        if is_from_index:
+            self.__segmented_voxels = self.__isocontour_index.get_voxel_count()
+        elif configuration.get_algorithm() == SegmentationAlgorithm.ISOCONTOUR:
+            self.__segmented_voxels = int(numpy.count_nonzero(segmented_images[0]))
+        else:
+            self.__watershed_markers = (axis, slice_index, segmented_images[1])
+            self.__segmented_voxels = int(numpy.count_nonzero(segmented_images[1] > 1))
+
+        pixel_spacing = self.__selected_file.get_pixel_spacing(axis)
+
+        shown_images = []
+        for segmented_image in segmented_images:
+            if segmented_image is None:
+                shown_images.append(None)
+            elif segmented_image.dtype == numpy.bool_:
+                shown_images.append(Utils.resize_mask(segmented_image, size=(400, 400), pixel_spacing=pixel_spacing))
+            elif segmented_image.dtype == numpy.int32:
+                # The watershed markers are shown as the mask of the segmented regions.
+                shown_images.append(Utils.resize_mask(segmented_image > 1, size=(400, 400),
+                                                      pixel_spacing=pixel_spacing))
+            else:
+                shown_images.append(Utils.resize_image(segmented_image, size=(400, 400), background_color=127,
+                                                       pixel_spacing=pixel_spacing))
+
+        return shown_images[0], shown_images[1]
+
+    def __segment_isocontour_slice(self, generation: int, axis: int, slice_index: int,
+                                   configuration: SegmentationConfiguration,
+                                   window_level: Tuple[float, float]) -> Tuple[Tuple, bool]:
+        """
+        Segments a slice with the isocontour method, using the index of the slice if the thresholds of the slice have
+        already changed. The thresholds are applied to the native slice, and the marked pixels are painted over the
+        slice mapped with the window.
+
+        Args:
+            generation: An integer, representing the load of the file the slice belongs to.
+            axis: An integer, representing the axis.
+            slice_index: An integer, representing the index of the image in the axis.
+            configuration: A SegmentationConfiguration object, with the isocontour parameters.
+            window_level: A tuple with the center and the width of the window, or None to map the range of the slice.
+
+        Returns:
+            A tuple with the mask and the marked image, and a boolean indicating if they come from the index.
+        """
+        upper_threshold = configuration.get_configuration()['upper_threshold']
+        lower_threshold = configuration.get_configuration()['lower_threshold']
+
+        native_slice = self.get_native_slice(axis, slice_index)
+
+        # The index keeps the shown slice, so it is built again if the window changes.
+        current_slice = (generation, axis, slice_index, window_level)
+        if self.__isocontour_index_slice != current_slice and self.__last_isocontour_slice == current_slice:
+            self.__isocontour_index = IsocontourIndex(native_slice, voxel_volume=self.get_voxel_volume(),
+                                                      display_image=Utils.window_image(native_slice, window_level))
+            self.__isocontour_index_slice = current_slice
+        self.__last_isocontour_slice = current_slice
+
+        if self.__isocontour_index_slice == current_slice:
+            return self.__isocontour_index.update(upper_threshold, lower_threshold), True
+
+        return isocontour_segment_image(native_slice, upper_threshold, lower_threshold,
+                                        display_image=Utils.window_image(native_slice, window_level)), False
+
+    def __segment_watershed_slice(self, generation: int, axis: int, slice_index: int,
+                                  configuration: SegmentationConfiguration) -> Tuple[numpy.ndarray, None]:
+        """
+        Segments a slice with the watershed method, reusing the working images of the segmenter and, if the slice has
+        not changed, its normalization.
+
+        Args:
+            generation: An integer, representing the load of the file the slice belongs to.
+            axis: An integer, representing the axis.
+            slice_index: An integer, representing the index of the image in the axis.
+            configuration: A SegmentationConfiguration object, with the watershed parameters.
+
+        Returns:
+            A tuple with the marked image and the markers, as returned by watershed_segment_image.
+        """
+        current_slice = (generation, axis, slice_index)
+        if self.__watershed_slice != current_slice:
+            self.__watershed_segmenter.set_image(self.get_native_slice(axis, slice_index))
+            self.__watershed_slice = current_slice
+
+        self.__watershed_segmenter.set_threshold(configuration.get_configuration()['threshold'])
+        color_image, markers = self.__watershed_segmenter.compute_markers()
+
+        # The images of the segmenter are reused by the next slice, so the returned images are copies.
+        marked_image = color_image.copy()
+        marked_image[markers == -1] = [255, 0, 0]
+
+        return marked_image, markers.copy()
+
+    def get_segmentation_statistics(self) -> Tuple[int, float]:
+        """
+        Returns the number of voxels and the volume marked by the last segmentation of a slice. With the watershed
+        method, the voxels of all the segmented regions are counted.
+
+        Returns:
+            A tuple with the number of voxels and the volume in cubic millimetres, or None if no slice has been
+            segmented.
+        """
+        if self.__segmented_voxels is None:
+            return None
+
+        return self.__segmented_voxels, self.__segmented_voxels * self.get_voxel_volume()
+
+    def get_label_statistics(self) -> Dict[str, numpy.ndarray]:
+        """
+        Measures each region of the last slice segmented with the watershed method.
+
+        Returns:
+            A dictionary with the area, bounding box and mean intensity of each region, as returned by
+            compute_label_statistics, or None if no slice has been segmented with the watershed method.
+        """
+        if self.__watershed_markers is None:
+            return None
+
+        axis, slice_index, markers = self.__watershed_markers
+        return compute_label_statistics(compact_labels(markers), self.get_native_slice(axis, slice_index))
+
+    def get_voxel_volume(self) -> float:
+        """
+        Returns the volume of a voxel of the loaded file.
+
+        Returns:
+            A float, representing the volume in cubic millimetres.
+        """
+        return float(numpy.prod(self.__selected_file.spacing))
+
+    def segment_volume(self, configuration: SegmentationConfiguration, packed: bool = False, workers: int = None):
+        """
+        Segments the whole tensor of the loaded file, at its original resolution.
+
+        Args:
+            configuration: A SegmentationConfiguration object, with the algorithm and its parameters.
+            packed: A boolean, indicating if the mask is packed into bits.
+            workers: An integer, representing the number of workers of the watershed method (optional).
+
+        Returns:
+            The mask of the volume, represented as a uint8 numpy array of the same shape as the tensor, or a tuple
+            with the packed mask and its shape if packed is set.
+        """
+        tensor = numpy.asarray(self.__selected_file.image_tensor)
+        mask: numpy.ndarray = None
+
+        if configuration.get_algorithm() == SegmentationAlgorithm.ISOCONTOUR:
+            upper_threshold = configuration.get_configuration()['upper_threshold']
+            lower_threshold = configuration.get_configuration()['lower_threshold']
+            mask = isocontour_segment_volume(tensor, upper_threshold, lower_threshold)
+
+        elif configuration.get_algorithm() == SegmentationAlgorithm.WATERSHED:
+            threshold = configuration.get_configuration()['threshold']
+            mask = watershed_segment_volume(tensor, threshold, workers=workers)
+
+        if packed:
+            return pack_mask(mask)
+
+        return mask
+
     def get_range(self, axis: int):
         """
         Returns the range of the DICOM file in a certain axis.
@@ -63,10 +360,41 @@ class SegmentationModel(threading.Thread):
         """
         return self.__selected_file.image_tensor.shape[axis] - 1
 
-    def get_slice_image(self, axis: int, slice_index: int) -> numpy.ndarray:
+    @Instrumentation.timed('SegmentationModel.get_slice_image')
+    def get_slice_image(self, axis: int, slice_index: int, window_level: Tuple[float, float] = None) -> numpy.ndarray:
         """
         Returns the slide image in an axis with a certain index.
 
+        The rendered slices are kept in a cache, and the next slices in the direction of scrolling are rendered in
+        background, so consecutive calls usually do not need to resize any image.
+
+        Args:
+            axis: An integer, representing the axis.
+            slice_index: An integer, representing the index of the image in the axis.
+            window_level: A tuple with the center and the width of the window applied to the slice (optional). If None,
+                          the display window of the file is used, as returned by SelectedFile.get_display_window.
+
+        Returns:
+            An image, represented as a read-only uint8 numpy array.
+        """
+        generation = self.__load_generation
+        if window_level is None:
+            window_level = self.__selected_file.get_display_window()
+
+        image = self.__slice_cache.get((generation, axis, slice_index, window_level))
+        if image is None:
+            image = self.__render_slice_image(axis, slice_index, window_level)
+            self.__slice_cache.put((generation, axis, slice_index, window_level), image)
+
+        self.__prefetch_slice_images(generation, axis, slice_index, window_level)
+
+        return image
+
+    def get_native_slice(self, axis: int, slice_index: int) -> numpy.ndarray:
+        """
+        Returns a slice of the tensor, at its original resolution. It is read from the contiguous copy of the axis if
+        it has already been built.
+
         Args:
             axis: An integer, representing the axis.
             slice_index: An integer, representing the index of the image in the axis.
@@ -74,15 +402,68 @@ class SegmentationModel(threading.Thread):
         Returns:
             An image, represented as a numpy array.
         """
-        if axis == 0:
-            return Utils.resize_image(image=self.__selected_file.image_tensor[slice_index, :, :],
-                                      size=(400, 400),
-                                      background_color=127)
-        elif axis == 1:
-            return Utils.resize_image(image=self.__selected_file.image_tensor[:, slice_index, :],
-                                      size=(400, 400),
-                                      background_color=127)
-        elif axis == 2:
-            return Utils.resize_image(image=self.__selected_file.image_tensor[:, :, slice_index],
-                                      size=(400, 400),
-                                      background_color=127)
+        return self.__axis_layouts.get_slice(axis, slice_index)
+
+    def __render_slice_image(self, axis: int, slice_index: int, window_level: Tuple[float, float]) -> numpy.ndarray:
+        """
+        Renders a slice of the tensor to be shown, with a window and the aspect ratio of its physical size.
+
+        Args:
+            axis: An integer, representing the axis.
+            slice_index: An integer, representing the index of the image in the axis.
+            window_level: A tuple with the center and the width of the window, or None to map the range of the slice.
+
+        Returns:
+            An image, represented as a uint8 numpy array.
+        """
+        return Utils.render_image(image=self.get_native_slice(axis, slice_index),
+                                  size=(400, 400),
+                                  window_level=window_level,
+                                  background_color=127,
+                                  pixel_spacing=self.__selected_file.get_pixel_spacing(axis))
+
+    def __prefetch_slice_images(self, generation: int, axis: int, slice_index: int, window_level: Tuple[float, float]):
+        """
+        Schedules the rendering of the next slices in the direction of scrolling. Only the last scheduled request is
+        rendered; the older ones are discarded.
+
+        Args:
+            generation: An integer, representing the load of the file the slices belong to.
+            axis: An integer, representing the axis.
+            slice_index: An integer, representing the index of the shown image in the axis.
+            window_level: A tuple with the center and the width of the window, or None.
+        """
+        direction = 1
+        if self.__last_shown_slice is not None and self.__last_shown_slice[0] == axis and \
+                slice_index < self.__last_shown_slice[1]:
+            direction = -1
+        self.__last_shown_slice = (axis, slice_index)
+
+        slice_indexes = [slice_index + direction * offset for offset in range(1, self.__prefetched_slices + 1)]
+        slice_indexes = [index for index in slice_indexes if 0 <= index <= self.get_range(axis)]
+
+        self.__prefetch_request += 1
+        self.__prefetch_executor.submit(self.__render_prefetched_slices, self.__prefetch_request, generation,
+                                        axis, slice_indexes, window_level)
+
+    def __render_prefetched_slices(self, request: int, generation: int, axis: int, slice_indexes: List[int],
+                                   window_level: Tuple[float, float]):
+        """
+        Renders in background the requested slices that are not cached.
+
+        Args:
+            request: An integer, representing the identifier of the prefetch request.
+            generation: An integer, representing the load of the file the slices belong to.
+            axis: An integer, representing the axis.
+            slice_indexes: A list of integers, representing the indexes of the slices to render.
+            window_level: A tuple with the center and the width of the window, or None.
+        """
+        for slice_index in slice_indexes:
+            if request != self.__prefetch_request:
+                return
+
+            key = (generation, axis, slice_index, window_level)
+            if not self.__slice_cache.contains(key):
+                image = self.__render_slice_image(axis, slice_index, window_level)
+                if request == self.__prefetch_request:
+                    self.__slice_cache.put(key, image)
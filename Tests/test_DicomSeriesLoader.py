@@ -0,0 +1,134 @@
+import numpy
+import pydicom
+import pytest
+
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.uid import ExplicitVRBigEndian, ExplicitVRLittleEndian, ImplicitVRLittleEndian, RLELossless, \
+    SecondaryCaptureImageStorage, generate_uid
+
+from Model.Base import DicomSeriesLoader
+
+
+def write_image(path: str, stored_values: numpy.ndarray, transfer_syntax: str, bits_allocated: int, bits_stored: int,
+                is_signed: bool) -> str:
+    """
+    Writes a single frame DICOM image with the given stored values.
+
+    Args:
+        path: A string, representing the path of the file.
+        stored_values: The values of the pixel data, represented as a numpy array of shape (rows, columns). The bits
+                       above BitsStored are written as they are.
+        transfer_syntax: A string, representing the transfer syntax UID of the file.
+        bits_allocated: An integer, representing the tag BitsAllocated.
+        bits_stored: An integer, representing the tag BitsStored.
+        is_signed: A boolean, indicating if the values are signed (PixelRepresentation 1).
+
+    Returns:
+        A string, representing the path of the file.
+    """
+    dataset = Dataset()
+    dataset.file_meta = FileMetaDataset()
+    dataset.file_meta.TransferSyntaxUID = transfer_syntax
+    dataset.file_meta.MediaStorageSOPClassUID = SecondaryCaptureImageStorage
+    dataset.file_meta.MediaStorageSOPInstanceUID = generate_uid()
+
+    dataset.SOPClassUID = SecondaryCaptureImageStorage
+    dataset.SOPInstanceUID = dataset.file_meta.MediaStorageSOPInstanceUID
+    dataset.Modality = 'OT'
+    dataset.Rows, dataset.Columns = stored_values.shape
+    dataset.SamplesPerPixel = 1
+    dataset.PhotometricInterpretation = 'MONOCHROME2'
+    dataset.BitsAllocated = bits_allocated
+    dataset.BitsStored = bits_stored
+    dataset.HighBit = bits_stored - 1
+    dataset.PixelRepresentation = 1 if is_signed else 0
+
+    if transfer_syntax == RLELossless:
+        dataset.file_meta.TransferSyntaxUID = ExplicitVRLittleEndian
+        dataset.compress(RLELossless, stored_values)
+    elif bits_allocated == 1:
+        dataset.PixelData = pydicom.pixels.pack_bits(stored_values)
+    else:
+        byte_order = '>' if transfer_syntax == ExplicitVRBigEndian else '<'
+        dataset.PixelData = stored_values.astype(stored_values.dtype.newbyteorder(byte_order)).tobytes()
+
+    dataset.save_as(path, enforce_file_format=True)
+
+    return path
+
+
+def random_values(dtype, shape=(7, 9), seed=0) -> numpy.ndarray:
+    """
+    Returns random values that use every bit of a type, so the bits above BitsStored are not zero.
+    """
+    random_generator = numpy.random.default_rng(seed)
+    information = numpy.iinfo(dtype)
+    return random_generator.integers(information.min, information.max, size=shape, endpoint=True, dtype=dtype)
+
+
+@pytest.mark.parametrize('transfer_syntax', [ImplicitVRLittleEndian, ExplicitVRLittleEndian])
+@pytest.mark.parametrize('dtype, bits_stored', [(numpy.uint8, 8), (numpy.int8, 8), (numpy.uint16, 16),
+                                                (numpy.int16, 16), (numpy.uint16, 12), (numpy.int16, 12),
+                                                (numpy.uint32, 32), (numpy.int32, 32), (numpy.int32, 20)])
+def test_raw_read_matches_pydicom(tmp_path, transfer_syntax, dtype, bits_stored):
+    dtype = numpy.dtype(dtype)
+    path = write_image(str(tmp_path / 'image.dcm'), random_values(dtype), transfer_syntax,
+                       bits_allocated=8 * dtype.itemsize, bits_stored=bits_stored, is_signed=dtype.kind == 'i')
+
+    header = DicomSeriesLoader.read_image_header(path)
+    image = DicomSeriesLoader.read_pixel_array(path, header)
+    expected_image = pydicom.dcmread(path).pixel_array
+
+    assert header.pixel_data_offset is not None
+    assert image.dtype == expected_image.dtype
+    numpy.testing.assert_array_equal(image, expected_image)
+
+
+@pytest.mark.parametrize('transfer_syntax, bits_allocated, stored_values', [
+    (ExplicitVRBigEndian, 16, random_values(numpy.uint16)),
+    (ExplicitVRBigEndian, 16, random_values(numpy.int16)),
+    (RLELossless, 16, random_values(numpy.uint16)),
+    (RLELossless, 16, random_values(numpy.int16)),
+    (ExplicitVRLittleEndian, 1, random_values(numpy.uint8) % 2),
+    (ImplicitVRLittleEndian, 1, random_values(numpy.uint8) % 2),
+])
+def test_unsupported_pixel_data_falls_back_to_pydicom(tmp_path, transfer_syntax, bits_allocated, stored_values):
+    dtype = stored_values.dtype
+    bits_stored = 1 if bits_allocated == 1 else 8 * dtype.itemsize
+    path = write_image(str(tmp_path / 'image.dcm'), stored_values, transfer_syntax,
+                       bits_allocated=bits_allocated, bits_stored=bits_stored, is_signed=dtype.kind == 'i')
+
+    header = DicomSeriesLoader.read_image_header(path)
+    image = DicomSeriesLoader.read_pixel_array(path, header)
+
+    assert header.pixel_data_offset is None
+    numpy.testing.assert_array_equal(image, pydicom.dcmread(path).pixel_array)
+    numpy.testing.assert_array_equal(image, stored_values)
+
+
+def test_decode_series_reads_each_file_into_its_slice(tmp_path):
+    slices = [random_values(numpy.int16, seed=seed) for seed in range(4)]
+    paths = [write_image(str(tmp_path / '{0}.dcm'.format(index)), stored_values, ExplicitVRLittleEndian,
+                         bits_allocated=16, bits_stored=12, is_signed=True)
+             for index, stored_values in enumerate(slices)]
+    headers = [DicomSeriesLoader.read_image_header(path) for path in paths]
+
+    volume = numpy.zeros(slices[0].shape + (len(paths),), dtype=numpy.int16)
+    DicomSeriesLoader.decode_series(paths, headers, volume, workers=2)
+
+    expected_volume = numpy.stack([pydicom.dcmread(path).pixel_array for path in paths], axis=-1)
+    numpy.testing.assert_array_equal(volume, expected_volume)
+
+
+def test_check_dtype_rejects_types_narrower_than_the_stored_values():
+    header = Dataset()
+    header.BitsAllocated = 16
+    header.BitsStored = 12
+    header.PixelRepresentation = 0
+
+    assert DicomSeriesLoader.check_dtype(header, numpy.int16) == numpy.int16
+    assert DicomSeriesLoader.check_dtype(header, numpy.float32) == numpy.float32
+
+    for dtype in (numpy.uint8, numpy.int8, numpy.float16):
+        with pytest.raises(ValueError):
+            DicomSeriesLoader.check_dtype(header, dtype)
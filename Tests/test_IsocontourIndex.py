@@ -0,0 +1,41 @@
+import numpy
+import pytest
+
+from Model.Segmentation.Algorithms.Isocontour import isocontour_segment_image
+from Model.Segmentation.Algorithms.IsocontourIndex import IsocontourIndex
+
+
+@pytest.mark.parametrize('dtype', [numpy.uint8, numpy.int16, numpy.float32])
+def test_updates_match_the_segmentation_of_each_thresholds(dtype):
+    random_generator = numpy.random.default_rng(0)
+    # Few distinct values, so many pixels are equal to the thresholds.
+    image = random_generator.integers(-20 if dtype != numpy.uint8 else 0, 60, size=(31, 17)).astype(dtype)
+    display_image = random_generator.integers(0, 255, size=image.shape, endpoint=True, dtype=numpy.uint8)
+
+    index = IsocontourIndex(image, voxel_volume=0.5, display_image=display_image)
+
+    # The thresholds move up and down, cross each other, leave the range of the image and repeat previous values.
+    thresholds = [(40, 10), (45, 10), (45, 30), (20, 5), (20, 30), (100, -100), (59, 59), (-50, -60), (40, 10)]
+    thresholds += [tuple(sorted(random_generator.integers(-30, 70, size=2)))[::-1] for _ in range(50)]
+
+    for upper_threshold, lower_threshold in thresholds:
+        mask, marked_image = index.update(upper_threshold, lower_threshold)
+        expected_mask, expected_marked_image = isocontour_segment_image(image, upper_threshold, lower_threshold,
+                                                                        display_image=display_image)
+
+        numpy.testing.assert_array_equal(mask, expected_mask)
+        numpy.testing.assert_array_equal(marked_image, expected_marked_image)
+        assert index.get_voxel_count() == numpy.count_nonzero(expected_mask)
+        assert index.get_volume() == pytest.approx(0.5 * numpy.count_nonzero(expected_mask))
+
+
+def test_marks_over_the_original_image_without_display_image():
+    image = numpy.arange(64, dtype=numpy.uint8).reshape(8, 8)
+    index = IsocontourIndex(image)
+
+    for upper_threshold, lower_threshold in [(30, 10), (50, 20), (5, 0)]:
+        mask, marked_image = index.update(upper_threshold, lower_threshold)
+        expected_mask, expected_marked_image = isocontour_segment_image(image, upper_threshold, lower_threshold)
+
+        numpy.testing.assert_array_equal(mask, expected_mask)
+        numpy.testing.assert_array_equal(marked_image, expected_marked_image)
@@ -5,7 +5,8 @@ from PIL import Image, ImageTk
 from tkinter import messagebox
 from typing import Callable, Tuple
 
-from Controller.Registering.RegisteringListenerCode import RegisteringListenerCode
+from Model.Base import Instrumentation
+from Model.Registering.RegisteringListenerCode import RegisteringListenerCode
 from View.Registering.Subviews.ReadDicomFiles import ReadDicomFiles
 from View.Utils.Base import Base
 from View.Registering.ViewBuilder import ToolsViewBuilder
@@ -175,12 +176,42 @@ class RegisterView(object):
             size=(110, 20)
         )
 
+        self.__optimizer_parameters_shrink_factors_label = Base.create_text_view(
+            parent_view=self.__root_view,
+            background_color=Color.TOOLS_PANEL_BACKGROUND,
+            text="Shrink factors",
+            font=Font.REGULAR,
+            position=(790, 380)
+        )
+
+        self.__optimizer_parameters_shrink_factors_entry = Base.create_edit_text(
+            parent_view=self.__root_view,
+            position=(940, 380),
+            size=(110, 20)
+        )
+        self.__optimizer_parameters_shrink_factors_entry.insert(0, "4, 2, 1")
+
+        self.__optimizer_parameters_smoothing_sigmas_label = Base.create_text_view(
+            parent_view=self.__root_view,
+            background_color=Color.TOOLS_PANEL_BACKGROUND,
+            text="Smoothing sigmas",
+            font=Font.REGULAR,
+            position=(790, 410)
+        )
+
+        self.__optimizer_parameters_smoothing_sigmas_entry = Base.create_edit_text(
+            parent_view=self.__root_view,
+            position=(940, 410),
+            size=(110, 20)
+        )
+        self.__optimizer_parameters_smoothing_sigmas_entry.insert(0, "2, 1, 0")
+
         self.__similarity_control_label = Base.create_text_view(
             parent_view=self.__root_view,
             background_color=Color.TOOLS_PANEL_BACKGROUND,
             text="SIMILARITY FUNCTION",
             font=Font.REGULAR,
-            position=(780, 380)
+            position=(780, 440)
         )
 
         self.__similarity_function = Base.create_integer_variable()
@@ -190,13 +221,38 @@ class RegisterView(object):
             command=None
         )
 
+        self.__use_series_reader = Base.create_integer_variable()
+        self.__use_series_reader_check_button = Base.create_check_button(
+            parent_view=self.__root_view,
+            text="Read series with SimpleITK",
+            background_color=Color.TOOLS_PANEL_BACKGROUND,
+            variable=self.__use_series_reader,
+            position=(790, 530)
+        )
+
         self.__compute_registration_button = Base.create_button(
             parent_view=self.__root_view,
             text="Compute registration",
-            position=(870, 490),
+            position=(870, 565),
             command=self.start_registration
         )
 
+        self.__cancel_registration_button = Base.create_button(
+            parent_view=self.__root_view,
+            text="Cancel registration",
+            position=(873, 600),
+            command=self.cancel_registration
+        )
+        self.__cancel_registration_button.configure(state='disabled')
+
+        self.__registration_progress_label = Base.create_text_view(
+            parent_view=self.__root_view,
+            background_color=Color.TOOLS_PANEL_BACKGROUND,
+            text="",
+            font=Font.REGULAR,
+            position=(790, 640)
+        )
+
     def enable_widgets(self):
         """
         Enables all the widgets in the view.
@@ -257,21 +313,24 @@ class RegisterView(object):
             alpha_image: The alpha-combination of both images, represented as a numpy array.
             registered_image: The registered image, represented as a numpy array.
         """
-        self.__first_image_view_image = ImageTk.PhotoImage(image=Image.fromarray(image1))
-        self.__first_image_view.itemconfig(self.__first_associated_image_view, image=self.__first_image_view_image)
+        with Instrumentation.measure('RegisterView.set_images.conversion'):
+            self.__first_image_view_image = ImageTk.PhotoImage(image=Image.fromarray(image1))
+            self.__second_image_view_image = ImageTk.PhotoImage(image=Image.fromarray(image2))
+            self.__alpha_image_view_image = ImageTk.PhotoImage(image=Image.fromarray(alpha_image))
 
-        self.__second_image_view_image = ImageTk.PhotoImage(image=Image.fromarray(image2))
-        self.__second_image_view.itemconfig(self.__second_associated_image_view, image=self.__second_image_view_image)
+            if registered_image is not None:
+                self.__registered_image_view_image = ImageTk.PhotoImage(image=Image.fromarray(registered_image))
 
-        self.__alpha_image_view_image = ImageTk.PhotoImage(image=Image.fromarray(alpha_image))
+        self.__first_image_view.itemconfig(self.__first_associated_image_view, image=self.__first_image_view_image)
+        self.__second_image_view.itemconfig(self.__second_associated_image_view, image=self.__second_image_view_image)
         self.__alpha_image_view.itemconfig(self.__alpha_associated_image_view, image=self.__alpha_image_view_image)
 
         if registered_image is not None:
-            self.__registered_image_view_image = ImageTk.PhotoImage(image=Image.fromarray(registered_image))
             self.__registered_image_view.itemconfig(self.__registered_associated_image_view,
                                                     image=self.__registered_image_view_image)
 
-        self.__root_view.update()
+        with Instrumentation.measure('RegisterView.set_images.update'):
+            self.__root_view.update()
 
     def open_file_dialog(self):
         """
@@ -291,22 +350,93 @@ class RegisterView(object):
         try:
             learning_rate = float(self.__optimizer_parameters_learning_rate_entry.get())
             number_iterations = int(self.__optimizer_parameters_iterations_entry.get())
+            shrink_factors = [int(value) for value in
+                              self.__optimizer_parameters_shrink_factors_entry.get().split(',') if value.strip()]
+            smoothing_sigmas = [float(value) for value in
+                                self.__optimizer_parameters_smoothing_sigmas_entry.get().split(',') if value.strip()]
+
+            if len(shrink_factors) == 0:
+                raise ValueError("At least one level is needed.")
+            if len(shrink_factors) != len(smoothing_sigmas):
+                raise ValueError("Each level needs a shrink factor and a sigma.")
+            if any(shrink_factor <= 0 for shrink_factor in shrink_factors):
+                raise ValueError("The shrink factors must be positive.")
+            if any(smoothing_sigma < 0 for smoothing_sigma in smoothing_sigmas):
+                raise ValueError("The smoothing sigmas cannot be negative.")
 
             self.__listener(RegisteringListenerCode.REGISTERING_WILL_START,
                             learning_rate=learning_rate,
                             number_iterations=number_iterations,
-                            similarity_function=self.__similarity_function.get())
+                            similarity_function=self.__similarity_function.get(),
+                            shrink_factors=shrink_factors,
+                            smoothing_sigmas=smoothing_sigmas,
+                            use_series_reader=self.__use_series_reader.get() == 1)
+        except ValueError as error:
+            messagebox.showerror("Error in parameters",
+                                 "Some of the introduced parameters are not correct. {0}".format(error))
         except:
             messagebox.showerror("Error in parameters", "Some of the introduced parameters are not correct.")
 
 
-    @staticmethod
-    def end_registration():
+    def cancel_registration(self):
+        """
+        Requests the cancellation of the running registration.
+        """
+        self.__cancel_registration_button.configure(state='disabled')
+        self.__registration_progress_label.configure(text="Cancelling...")
+        self.__listener(RegisteringListenerCode.REGISTERING_WILL_CANCEL)
+
+    def begin_registration(self):
+        """
+        Disables the registration button while the registration is running and enables its cancellation.
+        """
+        self.__compute_registration_button.configure(state='disabled')
+        self.__cancel_registration_button.configure(state='normal')
+        self.__registration_progress_label.configure(text="Starting registration...")
+
+    def set_registration_progress(self, level: int, iteration: int, metric_value: float):
+        """
+        Shows the progress of the running registration.
+
+        Args:
+            level: An integer, representing the current resolution level.
+            iteration: An integer, representing the current iteration of the optimizer.
+            metric_value: A float, representing the current value of the similarity function.
+        """
+        self.__registration_progress_label.configure(
+            text="Level {0} - Iteration {1} - Metric value {2:.6f}".format(level, iteration, metric_value))
+
+    def show_render_error(self, error: Exception):
+        """
+        Shows that the images could not be rendered. The last rendered images are kept.
+
+        Args:
+            error: The exception raised while rendering the images.
+        """
+        messagebox.showerror("Error while rendering", "The images could not be rendered: {0}".format(error))
+
+    def end_registration(self, status: int, error: str = None):
         """
         Shows an alert indicating that the registration process has finished.
+
+        Args:
+            status: An integer, representing the status of the registration. 1 represents success, 0 represents
+                    cancellation and -1 represents error.
+            error: A string, representing the error that stopped the registration, if the status is -1 (optional).
         """
-        messagebox.showerror("Registration completed", "The images have been registered successfully.")
+        self.__compute_registration_button.configure(state='normal')
+        self.__cancel_registration_button.configure(state='disabled')
+        self.__registration_progress_label.configure(text="")
 
+        if status == 1:
+            messagebox.showerror("Registration completed", "The images have been registered successfully.")
+        elif status == 0:
+            messagebox.showerror("Registration cancelled", "The registration has been cancelled.")
+        elif status == -1:
+            message = "Some error has occurred while registering the images."
+            if error is not None:
+                message = "{0} {1}".format(message, error)
+            messagebox.showerror("Error while registering", message)
 
     @staticmethod
     def show_read_status(status: int):
@@ -1,7 +1,8 @@
 import tkinter as tk
 
-from Controller.Registering.RegisteringListenerCode import RegisteringListenerCode
+from Model.Registering.RegisteringListenerCode import RegisteringListenerCode
 from Model.Base.SelectedFile import SelectedFile
+from Model.Base.VolumeCache import VolumeCache
 from tkinter import filedialog
 from tkinter import messagebox
 from typing import Callable
@@ -92,9 +93,9 @@ class ReadDicomFiles(object):
 
         if folder_path != "" or folder_path is not None:
             if button is self.__load_first_image_folder_button:
-                self.__first_image_file = SelectedFile(False, folder_path)
+                self.__first_image_file = SelectedFile(False, folder_path, cache=VolumeCache.default())
             elif button is self.__load_second_image_folder_button:
-                self.__second_image_file = SelectedFile(False, folder_path)
+                self.__second_image_file = SelectedFile(False, folder_path, cache=VolumeCache.default())
 
     def start_reading_files(self):
         """
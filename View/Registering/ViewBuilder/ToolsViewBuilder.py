@@ -70,7 +70,7 @@ def create_similarity_function_radio_button_group(parent_view: tk.BaseWidget,
                                                         variable=variable,
                                                         assigned_value=0,
                                                         command=command,
-                                                        position=(790, 410 + 0 * separation),
+                                                        position=(790, 470 + 0 * separation),
                                                         enabled=True)
 
     mean_square_radio_button = Base.create_radio_button(parent_view,
@@ -79,7 +79,7 @@ def create_similarity_function_radio_button_group(parent_view: tk.BaseWidget,
                                                         variable=variable,
                                                         assigned_value=1,
                                                         command=command,
-                                                        position=(790, 410 + 1 * separation),
+                                                        position=(790, 470 + 1 * separation),
                                                         enabled=True)
 
     return correlation_radio_button, mean_square_radio_button
@@ -1,12 +1,14 @@
 import numpy
 import tkinter as tk
 
-from Controller.Segmentation.SegmentationListenerCode import SegmentationListenerCode
 from PIL import Image, ImageTk
+from tkinter import messagebox
 from typing import Callable, Tuple
 
+from Model.Base import Instrumentation
 from Model.Segmentation.Algorithms.Configuration.SegmentationAlgorithm import SegmentationAlgorithm
 from Model.Segmentation.Algorithms.Configuration.SegmentationConfiguration import SegmentationConfiguration
+from Model.Segmentation.SegmentationListenerCode import SegmentationListenerCode
 from View.Segmentation.Subviews.ReadDicomFiles import ReadDicomFiles
 from View.Segmentation.ViewBuilder import ToolsViewBuilder
 from View.Utils.Base import Base
@@ -97,6 +99,14 @@ class SegmentationView(object):
             enabled=False
         )
 
+        self.__segmentation_statistics_label = Base.create_text_view(
+            parent_view=self.__root_view,
+            background_color=Color.TOOLS_PANEL_BACKGROUND,
+            text="",
+            font=Font.REGULAR,
+            position=(50, 662)
+        )
+
         self.__tools_1_separator_view = Base.create_separator(
             parent_view=self.__root_view,
             background_color=Color.TOOLS_PANEL_SEPARATOR,
@@ -286,6 +296,31 @@ class SegmentationView(object):
         self.__isocontour_upper_threshold_slider.configure(state='active')
         self.__isocontour_lower_threshold_slider.configure(state='active')
 
+    def show_render_error(self, error: Exception):
+        """
+        Shows that the images could not be rendered. The last rendered images are kept.
+
+        Args:
+            error: The exception raised while rendering the images.
+        """
+        messagebox.showerror("Error while rendering", "The images could not be rendered: {0}".format(error))
+
+    def show_volume_error(self, message: str):
+        """
+        Shows that the volume could not be read completely, and keeps only the Z axis, whose slices are read one by
+        one.
+
+        Args:
+            message: A string, representing the error.
+        """
+        messagebox.showerror("Error while reading", "The volume could not be read completely, so only the Z axis can "
+                                                    "be shown: {0}".format(message))
+
+        self.__radio_button_x_axis.configure(state='disabled')
+        self.__radio_button_y_axis.configure(state='disabled')
+        self.__axis_radio_button_group_value.set(2)
+        self.radio_button_did_change()
+
     def set_slider_limit(self, lower_limit: int, upper_limit: int):
         """
         Sets the limit in the slice slider.
@@ -318,19 +353,38 @@ class SegmentationView(object):
         Args:
             original_image: The image to be shown, represented as a numpy array.
         """
-        self.__image_view_image = ImageTk.PhotoImage(image=Image.fromarray(original_image))
+        with Instrumentation.measure('SegmentationView.set_images.conversion'):
+            self.__image_view_image = ImageTk.PhotoImage(image=Image.fromarray(original_image))
+            if mask_image is not None:
+                self.__segmented_mask_image = ImageTk.PhotoImage(image=Image.fromarray(mask_image))
+            if marked_image is not None:
+                self.__segmented_image = ImageTk.PhotoImage(image=Image.fromarray(marked_image))
+
         self.__image_view.itemconfig(self.__associated_image_view, image=self.__image_view_image)
 
         if mask_image is not None:
-            self.__segmented_mask_image = ImageTk.PhotoImage(image=Image.fromarray(mask_image))
             self.__segmented_mask_image_view.itemconfig(self.__associated_segmented_mask_image_view,
                                                         image=self.__segmented_mask_image)
         if marked_image is not None:
-            self.__segmented_image = ImageTk.PhotoImage(image=Image.fromarray(marked_image))
             self.__segmented_image_view.itemconfig(self.__associated_segmented_image_view,
                                                    image=self.__segmented_image)
 
-        self.__root_view.update()
+        with Instrumentation.measure('SegmentationView.set_images.update'):
+            self.__root_view.update()
+
+    def set_segmentation_statistics(self, statistics: Tuple[int, float] = None):
+        """
+        Shows the number of segmented voxels of the slice and their volume.
+
+        Args:
+            statistics: A tuple with the number of voxels and the volume in cubic millimetres. If None, the
+                        statistics are cleared.
+        """
+        if statistics is None:
+            self.__segmentation_statistics_label.configure(text="")
+        else:
+            self.__segmentation_statistics_label.configure(
+                text="Segmented voxels: {0} ({1:.2f} mm\u00b3)".format(statistics[0], statistics[1]))
 
 
 def show_main_view(listener: Callable) -> Tuple[tk.Tk, SegmentationView]:
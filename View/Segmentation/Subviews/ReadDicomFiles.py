@@ -1,7 +1,8 @@
 import tkinter as tk
 
-from Controller.Segmentation.SegmentationListenerCode import SegmentationListenerCode
+from Model.Segmentation.SegmentationListenerCode import SegmentationListenerCode
 from Model.Base.SelectedFile import SelectedFile
+from Model.Base.VolumeCache import VolumeCache
 from tkinter import filedialog
 from tkinter import messagebox
 from typing import Callable
@@ -58,7 +59,7 @@ class ReadDicomFiles(object):
                                               title="Select a directory")
 
         if folder_path != "" or folder_path is not None:
-            self.__image_file = SelectedFile(False, folder_path)
+            self.__image_file = SelectedFile(False, folder_path, cache=VolumeCache.default(), lazy=True)
 
     def start_reading_files(self):
         """
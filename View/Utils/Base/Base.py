@@ -171,6 +171,29 @@ def create_radio_button(parent_view: tk.BaseWidget, text: str, background_color:
     return radio_button
 
 
+def create_check_button(parent_view: tk.BaseWidget, text: str, background_color: Color, variable: tk.IntVar,
+                        position: Tuple[int, int]) -> tk.Checkbutton:
+    """
+    Creates a check button from its main components.
+
+    Args:
+        parent_view: A Tk object, representing the root view.
+        text: The text to be shown in the button.
+        background_color: A Color object, representing the solid background color.
+        variable: A IntVar object, representing the variable that stores 1 if the button is checked and 0 otherwise.
+        position: A Tuple of integers, representing the coordinates of the button.
+
+    Returns:
+        A Checkbutton object.
+    """
+    check_button = tk.Checkbutton(parent_view, text=text, bg=background_color.value, variable=variable,
+                                  onvalue=1, offvalue=0)
+    check_button.pack()
+    check_button.place(x=position[0], y=position[1])
+
+    return check_button
+
+
 def create_slider(parent_view: tk.BaseWidget, range: Tuple[int, int], orientation: Any,
                   background_color: Color, variable: tk.IntVar, command: Callable, position: Tuple[int, int],
                   length: int, enabled: bool) -> tk.Scale:
@@ -0,0 +1,100 @@
+import argparse
+import sys
+
+from Controller.Batch.BatchController import BatchController
+from Model.Segmentation.Algorithms.Configuration.SegmentationAlgorithm import SegmentationAlgorithm
+from Model.Segmentation.Algorithms.Configuration.SegmentationConfiguration import SegmentationConfiguration
+
+
+def parse_arguments(arguments):
+    """
+    Parses the arguments of the command line.
+
+    Args:
+        arguments: A list of strings, representing the arguments.
+
+    Returns:
+        An argparse.Namespace object with the parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description='Segments or registers many DICOM studies without the graphical '
+                                                 'interface.')
+    parser.add_argument('--output', required=True, help='folder where the results are written')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of studies processed at the same time (default: one per core)')
+    parser.add_argument('--read-workers', type=int, default=1, help='number of threads used to read each study')
+
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    segment_parser = subparsers.add_parser('segment', help='segment every slice of each study')
+    segment_parser.add_argument('--algorithm', choices=['isocontour', 'watershed'], default='isocontour')
+    segment_parser.add_argument('--lower-threshold', type=int, help='lower threshold of the isocontour method')
+    segment_parser.add_argument('--upper-threshold', type=int, help='upper threshold of the isocontour method')
+    segment_parser.add_argument('--threshold', type=int, help='threshold of the watershed method, from 0 to 255')
+    segment_parser.add_argument('studies', nargs='+', help='DICOM files or folders')
+
+    register_parser = subparsers.add_parser('register', help='register each moving study to its fixed study')
+    register_parser.add_argument('--learning-rate', type=float, default=1.0)
+    register_parser.add_argument('--iterations', type=int, default=100)
+    register_parser.add_argument('--similarity', choices=['correlation', 'mean-squares'], default='correlation')
+    register_parser.add_argument('--shrink-factors', type=int, nargs='+', default=[1])
+    register_parser.add_argument('--smoothing-sigmas', type=float, nargs='+', default=None)
+    register_parser.add_argument('--use-series-reader', action='store_true',
+                                 help='read the folders with the SimpleITK series reader')
+    register_parser.add_argument('studies', nargs='+',
+                                 help='DICOM files or folders, in pairs of fixed and moving study')
+
+    parsed_arguments = parser.parse_args(arguments)
+
+    if parsed_arguments.command == 'segment':
+        if parsed_arguments.algorithm == 'isocontour' and \
+                (parsed_arguments.lower_threshold is None or parsed_arguments.upper_threshold is None):
+            parser.error('the isocontour method requires --lower-threshold and --upper-threshold')
+        if parsed_arguments.algorithm == 'watershed' and parsed_arguments.threshold is None:
+            parser.error('the watershed method requires --threshold')
+    elif parsed_arguments.command == 'register' and len(parsed_arguments.studies) % 2 != 0:
+        parser.error('the studies to register must be given in pairs of fixed and moving study')
+
+    return parsed_arguments
+
+
+def main(arguments) -> int:
+    """
+    Runs the batch processing described by the arguments.
+
+    Args:
+        arguments: A list of strings, representing the arguments of the command line.
+
+    Returns:
+        An integer, representing the exit code: 0 if all the studies have been processed, or 1 otherwise.
+    """
+    parsed_arguments = parse_arguments(arguments)
+    controller = BatchController(parsed_arguments.output, workers=parsed_arguments.workers,
+                                 read_workers=parsed_arguments.read_workers)
+
+    if parsed_arguments.command == 'segment':
+        if parsed_arguments.algorithm == 'isocontour':
+            configuration = SegmentationConfiguration(
+                algorithm=SegmentationAlgorithm.ISOCONTOUR,
+                configuration={'upper_threshold': parsed_arguments.upper_threshold,
+                               'lower_threshold': parsed_arguments.lower_threshold})
+        else:
+            configuration = SegmentationConfiguration(algorithm=SegmentationAlgorithm.WATERSHED,
+                                                      configuration={'threshold': parsed_arguments.threshold})
+
+        results = controller.segment(parsed_arguments.studies, configuration)
+    else:
+        studies = parsed_arguments.studies
+        parameters = {'learning_rate': parsed_arguments.learning_rate,
+                      'number_iterations': parsed_arguments.iterations,
+                      'similarity_function': 0 if parsed_arguments.similarity == 'correlation' else 1,
+                      'shrink_factors': parsed_arguments.shrink_factors,
+                      'smoothing_sigmas': parsed_arguments.smoothing_sigmas,
+                      'use_series_reader': parsed_arguments.use_series_reader}
+
+        results = controller.register(list(zip(studies[0::2], studies[1::2])), parameters)
+
+    return 0 if all(result['status'] == 'ok' for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
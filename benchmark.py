@@ -0,0 +1,84 @@
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+
+from Benchmark import BenchmarkSuite
+
+
+def parse_arguments(arguments):
+    """
+    Parses the arguments of the command line.
+
+    Args:
+        arguments: A list of strings, representing the arguments.
+
+    Returns:
+        An argparse.Namespace object with the parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description='Measures the main operations of the tools on synthetic DICOM '
+                                                 'series.')
+    parser.add_argument('--shape', type=int, nargs=3, default=[256, 256, 64], metavar=('ROWS', 'COLUMNS', 'SLICES'),
+                        help='shape of the synthetic series')
+    parser.add_argument('--repeats', type=int, default=3, help='number of timed runs of each operation')
+    parser.add_argument('--registration-iterations', type=int, default=50,
+                        help='maximum number of iterations of the registration')
+    parser.add_argument('--save', help='JSON file where the results are written, to be used as baseline')
+    parser.add_argument('--baseline', help='JSON file with the results of a previous run')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='fraction of time that an operation can increase before it is reported as slower')
+
+    return parser.parse_args(arguments)
+
+
+def main(arguments) -> int:
+    """
+    Runs the benchmarks and compares them with the baseline, if any.
+
+    Args:
+        arguments: A list of strings, representing the arguments of the command line.
+
+    Returns:
+        An integer, representing the exit code: 1 if an operation is slower than the baseline, or 0 otherwise.
+    """
+    parsed_arguments = parse_arguments(arguments)
+    configuration = {'shape': parsed_arguments.shape,
+                     'repeats': parsed_arguments.repeats,
+                     'registration_iterations': parsed_arguments.registration_iterations}
+
+    work_folder = tempfile.mkdtemp(prefix='benchmark_')
+    try:
+        results = BenchmarkSuite.run_benchmarks(work_folder, tuple(parsed_arguments.shape), parsed_arguments.repeats,
+                                                parsed_arguments.registration_iterations)
+    finally:
+        shutil.rmtree(work_folder, ignore_errors=True)
+
+    baseline = None
+    if parsed_arguments.baseline is not None:
+        with open(parsed_arguments.baseline, 'r') as baseline_file:
+            baseline_report = json.load(baseline_file)
+
+        baseline = baseline_report['results']
+        if baseline_report['configuration'] != configuration:
+            print('The baseline was measured with a different configuration: {0}'.format(
+                baseline_report['configuration']))
+
+    print(BenchmarkSuite.format_results(results, baseline))
+
+    if parsed_arguments.save is not None:
+        with open(parsed_arguments.save, 'w') as save_file:
+            json.dump({'configuration': configuration, 'results': results}, save_file, indent=2)
+
+    if baseline is not None:
+        regressions = BenchmarkSuite.compare_with_baseline(results, baseline, parsed_arguments.tolerance)
+        for regression in regressions:
+            print(regression)
+
+        return 1 if len(regressions) > 0 else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,2 @@
+# The tests import the packages of the tool (Model, View, Controller) from the root of the repository, as the scripts
+# do. This file places that root in the path when pytest is run from it.